@@ -1,34 +1,85 @@
-from flask import Flask, jsonify, request
-import pymongo
-import os
+import time
+from flask import Flask, Response, g, jsonify, request
 from datetime import datetime, timedelta
-from bson.json_util import dumps
-import json
+from src import metrics
+from src.db import get_db as get_shared_db, pool_stats, command_metrics, Generation
+from src.pagination import InvalidCursor, keyset_filter, next_cursor, cached_count
+from src.search import text_query
+from src.catalog import Catalog, SOURCE, CATEGORY
+from src.indexes import SORTABLE_FIELDS
+from src.response_cache import ResponseCache
+from src.serialization import NEWS_PROJECTION, peek, stream_page, stream_ndjson, gzip_stream
 
 app = Flask(__name__)
 
-# MongoDB bağlantısı
+# MongoDB bağlantısı: istek başına yeni istemci yerine süreç genelindeki havuz
 def get_db():
-    mongodb_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-    client = pymongo.MongoClient(mongodb_uri)
-    return client.news_db
+    return get_shared_db()
 
-@app.route("/")
-def hello_world():
-    return "<p>Initial Backend for Web development!</p>"
+# Okuma endpoint'leri için yanıt önbelleği; parser her eklemede nesli artırır
+response_cache = ResponseCache.from_env(Generation(get_db()))
 
-@app.route("/api/news", methods=["GET"])
-def get_news():
-    # Query parametrelerini al
-    source = request.args.get("source")
-    category = request.args.get("category")
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
-    shared = request.args.get("shared")
-    limit = int(request.args.get("limit", 20))  # Varsayılan 20 haber
-    skip = int(request.args.get("skip", 0))
-    sort_by = request.args.get("sort_by", "created_at")
-    sort_order = int(request.args.get("sort_order", -1))  # Varsayılan en yeniden eskiye
+HTTP_REQUESTS = metrics.counter("http_requests", "API requests by route and status", ["route", "method", "status"])
+HTTP_REQUEST_SECONDS = metrics.histogram("http_request_seconds", "API request latency", ["route"])
+HTTP_MONGO_SECONDS = metrics.histogram(
+    "http_request_mongo_seconds", "Time an API request spent in MongoDB commands", ["route"]
+)
+
+def _route():
+    # Etiket olarak ham yol yerine kural ("/api/news") kullanılır; kardinalite sınırlı kalır
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+@app.before_request
+def start_timer():
+    g.request_start = time.monotonic()
+    command_metrics.reset()
+
+@app.after_request
+def record_request(response):
+    start = g.get("request_start")
+    if start is None:
+        return response
+    # Akıtılan yanıtlarda gövde bu noktadan sonra üretilir; süre ilk bayta kadardır
+    elapsed = time.monotonic() - start
+    mongo_seconds = command_metrics.elapsed()
+    route = _route()
+    HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    HTTP_REQUEST_SECONDS.observe(elapsed, route=route)
+    HTTP_MONGO_SECONDS.observe(mongo_seconds, route=route)
+    response.headers["Server-Timing"] = f"app;dur={1000 * elapsed:.1f}, mongo;dur={1000 * mongo_seconds:.1f}"
+    return response
+
+def _parse_bool(value, default=False):
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+def _news_page_response(head, documents, sort_by, limit, cursor_mode, total=None):
+    """Haber listesini cursor'dan doğrudan JSON olarak akıt"""
+    def tail(count, last):
+        result = {"count": count}
+        if cursor_mode:
+            result["next_cursor"] = next_cursor(last, count, sort_by, limit)
+        if total is not None:
+            result["total"] = total
+        return result
+    return Response(stream_page(head, documents, tail), mimetype="application/json")
+
+def _and_filters(*filters):
+    filters = [f for f in filters if f]
+    if not filters:
+        return {}
+    if len(filters) == 1:
+        return filters[0]
+    return {"$and": filters}
+
+def _build_news_filter(args):
+    """source, category, start_date, end_date ve shared parametrelerinden filtre oluştur"""
+    source = args.get("source")
+    category = args.get("category")
+    start_date = args.get("start_date")
+    end_date = args.get("end_date")
+    shared = args.get("shared")
     
     # Filtre oluştur
     query_filter = {}
@@ -42,10 +93,8 @@ def get_news():
             query_filter["source"] = source
     
     if category:
-        # RSS URL'inde kategori genellikle son kısımda olur
-        # Bu örnek için RSS URL'inden kategori çıkarıldığı varsayılmıştır
-        # Gerçek uygulamada bu veritabanı yapınıza göre ayarlanmalıdır
-        query_filter["url"] = {"$regex": f"/{category}", "$options": "i"}
+        # Kategoriler ekleme anında URL'den çıkarılıp indekslenebilir bir alanda tutulur
+        query_filter["categories"] = category.lower()
     
     # Tarih aralığı filtreleme
     date_filter = {}
@@ -54,14 +103,14 @@ def get_news():
             start_datetime = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
             date_filter["$gte"] = start_datetime.isoformat()
         except ValueError:
-            return jsonify({"error": "Geçersiz başlangıç tarihi formatı. ISO format kullanın (YYYY-MM-DDTHH:MM:SS)"}), 400
+            return None, "Geçersiz başlangıç tarihi formatı. ISO format kullanın (YYYY-MM-DDTHH:MM:SS)"
     
     if end_date:
         try:
             end_datetime = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
             date_filter["$lte"] = end_datetime.isoformat()
         except ValueError:
-            return jsonify({"error": "Geçersiz bitiş tarihi formatı. ISO format kullanın (YYYY-MM-DDTHH:MM:SS)"}), 400
+            return None, "Geçersiz bitiş tarihi formatı. ISO format kullanın (YYYY-MM-DDTHH:MM:SS)"
     
     if date_filter:
         query_filter["created_at"] = date_filter
@@ -70,88 +119,153 @@ def get_news():
     if shared is not None:
         query_filter["shared"] = shared.lower() == "true"
     
+    return query_filter, None
+
+@app.route("/")
+def hello_world():
+    return "<p>Initial Backend for Web development!</p>"
+
+@app.route("/api/news", methods=["GET"])
+@response_cache.cached
+def get_news():
+    # Query parametrelerini al
+    limit = int(request.args.get("limit", 20))  # Varsayılan 20 haber
+    skip = int(request.args.get("skip", 0))
+    sort_by = request.args.get("sort_by", "created_at")
+    sort_order = int(request.args.get("sort_order", -1))  # Varsayılan en yeniden eskiye
+    # cursor parametresi verilirse (ilk sayfa için boş) skip yerine keyset sayfalama kullanılır
+    cursor = request.args.get("cursor")
+    with_total = _parse_bool(request.args.get("with_total"), default=cursor is None)
+    
+    # Yalnızca indeksli alanlara göre sıralamaya izin ver
+    if sort_by not in SORTABLE_FIELDS:
+        return jsonify({"error": f"Geçersiz sıralama alanı. Kullanılabilir alanlar: {', '.join(SORTABLE_FIELDS)}"}), 400
+    
+    query_filter, error = _build_news_filter(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+    
     # MongoDB'den haberleri getir
     db = get_db()
     news_collection = db.news
     
     try:
-        # Toplam kayıt sayısını al
-        total_count = news_collection.count_documents(query_filter)
+        page_filter = query_filter
+        if cursor is not None:
+            page_filter = _and_filters(query_filter, keyset_filter(sort_by, sort_order, cursor))
         
-        # Haberleri getir
-        cursor = news_collection.find(
-            query_filter
+        # Haberleri getir; yalnızca API'nin döndürdüğü alanlar okunur
+        cursor_query = news_collection.find(
+            page_filter, {**NEWS_PROJECTION, sort_by: 1}
         ).sort(
-            sort_by, sort_order
-        ).skip(skip).limit(limit)
-        
-        # BSON formatını JSON'a çevir
-        news_list = json.loads(dumps(list(cursor)))
+            [(sort_by, sort_order), ("_id", sort_order)]
+        ).limit(limit)
+        if cursor is None:
+            cursor_query = cursor_query.skip(skip)
+        documents = peek(cursor_query)
         
-        # Sonuç formatı
-        result = {
-            "success": True,
-            "count": len(news_list),
-            "total": total_count,
-            "skip": skip,
-            "limit": limit,
-            "data": news_list
-        }
+        # Toplam kayıt sayısı isteğe bağlı ve kısa süreli önbellekli
+        total = cached_count(news_collection, query_filter) if with_total else None
         
-        return jsonify(result)
+        head = {"success": True, "limit": limit}
+        if cursor is None:
+            head["skip"] = skip
+        return _news_page_response(head, documents, sort_by, limit, cursor is not None, total)
     
+    except InvalidCursor:
+        return jsonify({"success": False, "error": "Geçersiz cursor değeri."}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+def _catalog_response(kind):
+    # Katalog yalnızca parser tarafından oluşturulur; o zamana kadar liste boş döner
+    entries = Catalog(get_db()).entries(kind)
+    with_counts = _parse_bool(request.args.get("with_counts"))
+    return jsonify({
+        "success": True,
+        "count": len(entries),
+        "data": entries if with_counts else [entry["name"] for entry in entries]
+    })
+
 @app.route("/api/sources", methods=["GET"])
+@response_cache.cached
 def get_sources():
     """Mevcut haber kaynaklarını listele"""
-    db = get_db()
-    news_collection = db.news
-    
     try:
-        # Distinct kaynak listesini getir
-        sources = news_collection.distinct("source")
-        return jsonify({
-            "success": True,
-            "count": len(sources),
-            "data": sources
-        })
+        return _catalog_response(SOURCE)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route("/api/categories", methods=["GET"])
+@response_cache.cached
 def get_categories():
-    """Haber URL'lerinden kategorileri çıkararak listele"""
+    """Haber URL'lerinden çıkarılan kategorileri listele"""
+    try:
+        return _catalog_response(CATEGORY)
+    
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route("/api/news/export", methods=["GET"])
+def export_news():
+    """Filtrelenmiş haberleri NDJSON olarak akıt (toplu tüketiciler için)"""
+    query_filter, error = _build_news_filter(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    sort_order = int(request.args.get("sort_order", 1))  # Varsayılan eskiden yeniye
+    batch_size = min(int(request.args.get("batch_size", 1000)), 10000)
+    checkpoint_every = int(request.args.get("checkpoint_every", 1000))
+    use_gzip = _parse_bool(request.args.get("gzip"))
+    # Kesilen bir dışa aktarım son checkpoint değeriyle cursor parametresi verilerek sürdürülür
+    cursor = request.args.get("cursor")
+    
     db = get_db()
     news_collection = db.news
     
     try:
-        # URL'lerden kategorileri çıkar
-        all_urls = news_collection.distinct("url")
-        categories = set()
-        
-        for url in all_urls:
-            # URL'yi parçalara ayır ve kategori olabilecek kısmı bul
-            # Örnek: https://t24.com.tr/rss/haber/gundem -> gundem
-            parts = url.split("/")
-            if len(parts) >= 5:  # En az 5 parça olmalı (https://domain.com/rss/haber/kategori)
-                categories.add(parts[-1])
-                if len(parts) >= 6:
-                    categories.add(parts[-2])
-        
-        # Çok kısa ve anlamsız olabilecek parçaları temizle
-        filtered_categories = [c for c in categories if len(c) > 3 and not c.startswith("http")]
-        
-        return jsonify({
-            "success": True,
-            "count": len(filtered_categories),
-            "data": sorted(filtered_categories)
-        })
+        export_filter = _and_filters(query_filter, keyset_filter("created_at", sort_order, cursor))
+        cursor_query = news_collection.find(export_filter, NEWS_PROJECTION).sort(
+            [("created_at", sort_order), ("_id", sort_order)]
+        ).batch_size(batch_size)
+        documents = peek(cursor_query)
     
+    except InvalidCursor:
+        return jsonify({"success": False, "error": "Geçersiz cursor değeri."}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
+    
+    chunks = stream_ndjson(documents, "created_at", checkpoint_every, batch_size)
+    headers = {}
+    if use_gzip:
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return Response(chunks, mimetype="application/x-ndjson", headers=headers)
+
+@app.route("/api/status/db", methods=["GET"])
+def get_db_status():
+    """MongoDB bağlantı havuzu metriklerini göster"""
+    return jsonify({
+        "success": True,
+        "data": pool_stats()
+    })
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus metin formatında süreç metrikleri"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route("/debug/profile", methods=["GET"])
+def get_profile():
+    """PROFILER_ENABLED=true ise verilen saniye boyunca örnekleyip katlanmış yığınları döndür"""
+    if not metrics.profiler_enabled():
+        return jsonify({"error": "Profiler kapalı."}), 404
+    try:
+        collapsed = metrics.profiler.profile(metrics.profile_seconds(request.args.get("seconds")))
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    return Response(collapsed, mimetype="text/plain")
 
 @app.route("/api/news/search", methods=["GET"])
 def search_news():
@@ -162,36 +276,42 @@ def search_news():
     
     limit = int(request.args.get("limit", 20))
     skip = int(request.args.get("skip", 0))
+    cursor = request.args.get("cursor")
+    with_total = _parse_bool(request.args.get("with_total"), default=cursor is None)
     
     db = get_db()
     news_collection = db.news
     
     try:
-        # Başlık ve açıklamada aramamızı sağlayan filtreleme
-        search_filter = {
-            "$or": [
-                {"title": {"$regex": query, "$options": "i"}},
-                {"description": {"$regex": query, "$options": "i"}}
-            ]
-        }
+        # Türkçe normalize edilmiş metin indeksi üzerinde arama
+        search_filter = text_query(query)
+        if not search_filter:
+            return jsonify({"error": "Arama sorgusu geçerli bir kelime içermiyor."}), 400
         
-        # Toplam eşleşme sayısını al
-        total_count = news_collection.count_documents(search_filter)
+        projection = {**NEWS_PROJECTION, "score": {"$meta": "textScore"}}
+        if cursor is None:
+            # Varsayılan sıralama: alaka düzeyi, ardından tarih
+            cursor_query = news_collection.find(search_filter, projection).sort(
+                [("score", {"$meta": "textScore"}), ("created_at", -1)]
+            ).skip(skip).limit(limit)
+        else:
+            # Cursor modunda sayfalar tarihe göre ilerler
+            page_filter = _and_filters(search_filter, keyset_filter("created_at", -1, cursor))
+            cursor_query = news_collection.find(page_filter, projection).sort(
+                [("created_at", -1), ("_id", -1)]
+            ).limit(limit)
+        documents = peek(cursor_query)
         
-        # Eşleşen haberleri getir
-        cursor = news_collection.find(search_filter).sort("created_at", -1).skip(skip).limit(limit)
-        news_list = json.loads(dumps(list(cursor)))
+        # Toplam eşleşme sayısı isteğe bağlı ve kısa süreli önbellekli
+        total = cached_count(news_collection, search_filter) if with_total else None
         
-        return jsonify({
-            "success": True,
-            "count": len(news_list),
-            "total": total_count,
-            "query": query,
-            "skip": skip,
-            "limit": limit,
-            "data": news_list
-        })
+        head = {"success": True, "query": query, "limit": limit}
+        if cursor is None:
+            head["skip"] = skip
+        return _news_page_response(head, documents, "created_at", limit, cursor is not None, total)
     
+    except InvalidCursor:
+        return jsonify({"success": False, "error": "Geçersiz cursor değeri."}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
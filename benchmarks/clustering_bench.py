@@ -0,0 +1,114 @@
+"""Throughput and quality benchmark of the ingest-time story clusterer.
+
+Generates synthetic stories, each reported by several "sources" with
+dropped, replaced and reordered words, and feeds them to StoryClusterer
+in arrival order, the way NewsParser does. Prints JSON with items/second,
+per-item latency percentiles, index size and clustering quality:
+
+- recall: share of variants that landed in their story's first cluster
+- purity: share of clusters that contain a single story
+
+    python benchmarks/clustering_bench.py --items 100000
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.clustering import StoryClusterer  # noqa: E402
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    letters = string.ascii_lowercase
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+
+
+def variant(words: list, vocabulary: list, rng: random.Random, noise: float) -> list:
+    """A source's rewording of a story: some words dropped or replaced, a few swapped."""
+    out = []
+    for word in words:
+        roll = rng.random()
+        if roll < noise / 2:
+            continue
+        out.append(rng.choice(vocabulary) if roll < noise else word)
+    for _ in range(len(out) // 10):
+        i, j = rng.randrange(len(out)), rng.randrange(len(out))
+        out[i], out[j] = out[j], out[i]
+    return out
+
+
+def generate(items: int, sources: int, noise: float, seed: int):
+    """Yield (story id, title, description) in arrival order."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(20000, rng)
+    produced = 0
+    story = 0
+    while produced < items:
+        title = rng.sample(vocabulary, rng.randint(8, 12))
+        description = rng.sample(vocabulary, 25)
+        for _ in range(min(rng.randint(1, sources), items - produced)):
+            yield (story, " ".join(variant(title, vocabulary, rng, noise)),
+                   " ".join(variant(description, vocabulary, rng, noise)))
+            produced += 1
+        story += 1
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MinHash/LSH story clustering.")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--sources", type=int, default=9, help="max reports per story")
+    parser.add_argument("--noise", type=float, default=0.2, help="share of words dropped or replaced")
+    parser.add_argument("--num-perm", type=int, default=64)
+    parser.add_argument("--bands", type=int, default=32)
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    dataset = list(generate(args.items, args.sources, args.noise, args.seed))
+    clusterer = StoryClusterer(window_hours=24 * 365, num_perm=args.num_perm, bands=args.bands,
+                               threshold=args.threshold)
+
+    latencies = []
+    story_cluster = {}
+    cluster_stories = {}
+    hits = 0
+    start = time.perf_counter()
+    for index, (story, title, description) in enumerate(dataset):
+        t0 = time.perf_counter()
+        cluster_id = clusterer.assign(index, title, description)
+        latencies.append(time.perf_counter() - t0)
+        if story in story_cluster:
+            hits += story_cluster[story] == cluster_id
+        else:
+            story_cluster[story] = cluster_id
+        cluster_stories.setdefault(cluster_id, set()).add(story)
+    elapsed = time.perf_counter() - start
+
+    repeats = len(dataset) - len(story_cluster)
+    print(json.dumps({
+        "items": len(dataset),
+        "stories": len(story_cluster),
+        "clusters": len(cluster_stories),
+        "seconds": round(elapsed, 2),
+        "items_per_second": round(len(dataset) / elapsed),
+        "p50_ms": round(1000 * percentile(latencies, 0.5), 3),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 3),
+        "indexed": len(clusterer),
+        "recall": round(hits / repeats, 4) if repeats else None,
+        "purity": round(sum(len(s) == 1 for s in cluster_stories.values()) / len(cluster_stories), 4),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
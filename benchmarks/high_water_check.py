@@ -0,0 +1,81 @@
+"""Offline check of the per-feed high-water mark in parse_feed_document.
+
+Parses small RSS documents over two polls, the way NewsParser does, and
+fails if:
+
+- an entry with a future (typo) date moves the high-water mark, so that
+  an entry published now is dropped on the next poll
+- a high-water mark stored earlier from such a date still hides new entries
+- an entry dropped by the high-water check is written into seen_ids
+- old, already-seen entries are not skipped any more
+
+    python benchmarks/high_water_check.py
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.news_parser import HIGH_WATER_GRACE, parse_feed_document  # noqa: E402
+
+DAY = 86400
+
+
+def rss(entries: list) -> bytes:
+    """RSS document of (guid, published timestamp) entries."""
+    items = "".join(
+        f"<item><title>Haber {guid}</title><link>https://example.com/{guid}</link>"
+        f"<guid>{guid}</guid><pubDate>{format_datetime(datetime.fromtimestamp(ts, timezone.utc))}</pubDate>"
+        f"<description>Özet {guid}</description></item>"
+        for guid, ts in entries
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>test</title>{items}</channel></rss>").encode("utf-8")
+
+
+def poll(entries: list, state: dict = None) -> tuple:
+    state = state or {}
+    _, items, _, feed_state = parse_feed_document(
+        rss(entries), {}, "test", "", datetime.utcnow().isoformat(),
+        high_water=state.get("high_water"), seen_ids=state.get("seen_ids")
+    )
+    return [item["url"].rsplit("/", 1)[1] for item in items], feed_state
+
+
+def main() -> int:
+    now = time.time()
+    results = {}
+
+    # 1) Yıl hatalı (bir yıl ileri) bir girdi, ardından şimdi yayımlanan yeni bir girdi
+    first, state = poll([("typo", now + 365 * DAY), ("a", now - 3600)])
+    second, state = poll([("new", now), ("typo", now + 365 * DAY), ("a", now - 3600)], state)
+    results["future_date"] = {
+        "first_poll": first, "second_poll": second, "high_water": state["high_water"],
+        "ok": first == ["typo", "a"] and second == ["new"] and state["high_water"] <= now + 3600,
+    }
+
+    # 2) Eski sürümün ileri tarihe kaydettiği işaret yeni girdileri gizlememeli
+    items, _ = poll([("fresh", now)], {"high_water": now + 365 * DAY, "seen_ids": []})
+    results["stored_future_high_water"] = {"items": items, "ok": items == ["fresh"]}
+
+    # 3) İşaretle atlanan eski girdi seen_ids'e yazılmamalı; görülmüş girdiler atlanmalı
+    old = now - HIGH_WATER_GRACE - DAY
+    items, state = poll([("b", now), ("old", old), ("a", now - 3600)],
+                        {"high_water": now - 60, "seen_ids": ["a"]})
+    results["seen_ids"] = {
+        "items": items, "seen_ids": state["seen_ids"], "skipped": state["skipped"],
+        "ok": items == ["b"] and "old" not in state["seen_ids"] and state["seen_ids"][:2] == ["b", "a"]
+              and state["skipped"] == 2,
+    }
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if all(r["ok"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Offline check of the summary text/image extraction in src/html_extract.py.
+
+Runs HTML fragments like the ones feeds put in <description> through the
+html.parser backend, and through lxml when it is installed. Fails if the
+text of <script>, <style>, <template> or HTML comments ends up in the
+extracted text, or if the first image is not found. That text would
+otherwise reach the description, the search fields and the cluster
+shingles.
+
+    python benchmarks/html_extract_check.py
+"""
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src import html_extract  # noqa: E402
+
+CASES = [
+    ("<p>Haber metni</p><script>var x = 1;</script><style>.a{color:red}</style>", "Haber metni", None),
+    ('<img src="http://example.com/a.jpg" /><br />Metin <b>kalın</b><!-- reklam --> son',
+     "Metin kalın son", "http://example.com/a.jpg"),
+    ("<div>Önce<template><p>şablon</p></template> sonra</div>", "Önce sonra", None),
+    ('<script type="text/javascript">document.write("<p>x</p>");</script><p>Gövde</p>'
+     '<img src="b.jpg">', "Gövde", "b.jpg"),
+]
+
+
+def main() -> int:
+    backends = {"html.parser": html_extract._extract_stdlib}
+    if html_extract.BACKEND == "lxml":
+        backends["lxml"] = html_extract._extract_lxml
+
+    results = []
+    for name, extract in backends.items():
+        for markup, text, image in CASES:
+            got_text, got_image = extract(markup)
+            results.append({
+                "backend": name,
+                "markup": markup,
+                "text": got_text,
+                "image": got_image,
+                "ok": got_text == text and got_image == image,
+            })
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""Ingestion benchmark for NewsParser.parse_feeds against local fixture feeds.
+
+The RSS/Atom templates in benchmarks/fixtures/ mirror the formats of the
+feeds in rss_feed_list.csv. They are rendered into --feeds feeds of
+--entries entries each and served from a local HTTP server with ETags.
+Each cycle publishes --fresh new entries per feed. Cycle 1 is a cold
+ingest; later cycles measure the steady state (304s, the high-water mark
+and dedup). The benchmark runs against mongomock by default, or against a
+throwaway mongod given with --mongodb-uri. It writes to that server's
+news_db and refuses to start on a non-empty one unless --drop-db is
+given.
+
+Prints JSON per cycle: wall time, items/second, summed per-stage seconds
+(fetch, feedparser, dedup, clean, write), feed statuses and peak memory.
+mongomock scans a collection for every upsert, so its write and dedup
+times grow with the collection. Compare those stages only on mongod.
+tracemalloc slows Python code down; pass --no-tracemalloc when comparing
+CPU stages across runs.
+
+    python benchmarks/ingest_bench.py --feeds 200 --entries 50 --cycles 3
+    python benchmarks/ingest_bench.py --mongodb-uri mongodb://localhost:27017 --drop-db --parse-workers 4
+"""
+import argparse
+import csv
+import hashlib
+import inspect
+import json
+import logging
+import os
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+STAGES = ("fetch", "feedparser", "dedup", "clean", "write")
+
+
+def load_templates() -> list:
+    """(header, entry, footer) templates split on the ENTRY markers of each fixture."""
+    templates = []
+    for name in sorted(n for n in os.listdir(FIXTURES) if n.endswith(".xml")):
+        with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+            text = f.read()
+        head, rest = text.split("<!-- ENTRY -->\n", 1)
+        entry, tail = rest.split("<!-- /ENTRY -->\n", 1)
+        templates.append((name, Template(head), Template(entry), Template(tail)))
+    return templates
+
+
+def real_sources() -> list:
+    """(source name, image url) pairs from the production feed list."""
+    with open(os.path.join(ROOT, "rss_feed_list.csv"), newline="", encoding="utf-8") as f:
+        return [(row[2], row[1]) for row in csv.reader(f) if len(row) >= 3]
+
+
+class FixtureFeeds:
+    """Renders feed bodies for the current cycle; entry i is published i minutes after the epoch."""
+
+    def __init__(self, feeds: int, entries: int, fresh: int):
+        self.templates = load_templates()
+        self.sources = real_sources()
+        self.feeds = feeds
+        self.entries = entries
+        self.fresh = fresh
+        self.epoch = datetime.utcnow() - timedelta(days=1)
+        self.bodies = {}
+        self.lock = threading.Lock()
+
+    def path(self, feed: int) -> str:
+        return f"/{self.sources[feed % len(self.sources)][0]}/{feed}.xml"
+
+    def render(self, cycle: int) -> None:
+        bodies = {}
+        first = cycle * self.fresh
+        for feed in range(self.feeds):
+            _, head, entry, tail = self.templates[feed % len(self.templates)]
+            source = self.sources[feed % len(self.sources)][0]
+            host = f"{source}-{feed}.example"
+            newest = self.epoch + timedelta(minutes=first + self.entries)
+            values = {"source": source, "host": host, "pubdate": format_datetime(newest),
+                      "isodate": newest.isoformat() + "Z"}
+            parts = [head.substitute(values)]
+            # En yeni girdi başta, gerçek feed'lerdeki gibi
+            for i in reversed(range(first, first + self.entries)):
+                published = self.epoch + timedelta(minutes=i)
+                parts.append(entry.substitute(values, i=i, pubdate=format_datetime(published),
+                                              isodate=published.isoformat() + "Z"))
+            parts.append(tail.substitute(values))
+            body = "".join(parts).encode("utf-8")
+            bodies[self.path(feed)] = (body, hashlib.md5(body).hexdigest())
+        with self.lock:
+            self.bodies = bodies
+
+
+def make_handler(fixtures: FixtureFeeds):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # Başlık ve gövde ayrı yazıldığından Nagle gecikmesi her isteğe ~40ms eklerdi
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            with fixtures.lock:
+                found = fixtures.bodies.get(self.path)
+            if found is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body, etag = found
+            if self.headers.get("If-None-Match") == f'"{etag}"':
+                self.send_response(304)
+                self.send_header("ETag", f'"{etag}"')
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+            self.send_header("ETag", f'"{etag}"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def mongomock_client():
+    import mongomock
+    from mongomock.collection import BulkOperationBuilder
+    add_update = BulkOperationBuilder.add_update
+    # pymongo >= 4.11 UpdateOne, bulk_write'a sort=None geçirir; mongomock bunu henüz kabul etmiyor
+    if "sort" not in inspect.signature(add_update).parameters:
+        def add_update_compat(self, *args, sort=None, **kwargs):
+            return add_update(self, *args, **kwargs)
+        BulkOperationBuilder.add_update = add_update_compat
+    return mongomock.MongoClient()
+
+
+def peak_rss_mb() -> float:
+    # Linux'ta KiB, macOS'ta bayt
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+def summarize(report: list, wall: float, traced_peak) -> dict:
+    added = sum(timing["added"] for timing in report)
+    statuses = Counter(str(timing["skipped"] or timing["status"]) for timing in report)
+    return {
+        "wall_seconds": round(wall, 3),
+        "items_added": added,
+        "items_per_second": round(added / wall, 1) if wall else None,
+        "entries_seen": sum(timing["entries"] for timing in report),
+        "entries_skipped_high_water": sum(timing["seen"] for timing in report),
+        "duplicates": sum(timing["duplicates"] for timing in report),
+        "feeds": dict(statuses),
+        # Feed'ler eşzamanlı indirildiği için fetch toplamı duvar saatini aşabilir
+        "stage_seconds": {stage: round(sum(timing.get(stage, 0.0) for timing in report), 3)
+                          for stage in STAGES},
+        "tracemalloc_peak_mb": round(traced_peak / 2 ** 20, 1) if traced_peak is not None else None,
+        "max_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NewsParser ingestion on local fixture feeds.")
+    parser.add_argument("--feeds", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=20, help="entries per feed")
+    parser.add_argument("--fresh", type=int, default=3, help="new entries per feed in each later cycle")
+    parser.add_argument("--cycles", type=int, default=2)
+    parser.add_argument("--parse-workers", type=int, default=0)
+    parser.add_argument("--fetch-concurrency", type=int, default=16)
+    # Tüm fixture feed'leri tek bir yerel sunucudan (tek host) gelir
+    parser.add_argument("--fetch-per-host", type=int, default=16,
+                        help="per-host connection limit (every fixture feed shares one host)")
+    parser.add_argument("--mongodb-uri", help="throwaway mongod to use instead of mongomock")
+    parser.add_argument("--drop-db", action="store_true", help="drop news_db on --mongodb-uri first")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip Python allocation tracing")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    fixtures = FixtureFeeds(args.feeds, args.entries, args.fresh)
+    fixtures.render(0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fixtures))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    from src import db as shared_db
+    if args.mongodb_uri:
+        uri = args.mongodb_uri
+        client = shared_db.get_client(uri)
+        if args.drop_db:
+            client.drop_database("news_db")
+        elif client.news_db.news.estimated_document_count():
+            parser.error(f"news_db on {uri} is not empty; use a throwaway mongod or pass --drop-db")
+    else:
+        uri = "mongodb://mongomock"
+        shared_db._clients[uri] = mongomock_client()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as f:
+        writer = csv.writer(f)
+        for feed in range(args.feeds):
+            source, image = fixtures.sources[feed % len(fixtures.sources)]
+            writer.writerow([base + fixtures.path(feed), image, source])
+        csv_file = f.name
+
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+
+    from src.news_parser import NewsParser
+    init_start = time.perf_counter()
+    news_parser = NewsParser(mongodb_uri=uri, csv_file=csv_file, fetch_concurrency=args.fetch_concurrency,
+                             fetch_per_host=args.fetch_per_host, parse_workers=args.parse_workers)
+    init_seconds = time.perf_counter() - init_start
+
+    cycles = []
+    try:
+        for cycle in range(args.cycles):
+            if cycle:
+                fixtures.render(cycle)
+            if not args.no_tracemalloc:
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            news_parser.parse_feeds()
+            wall = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if not args.no_tracemalloc else None
+            cycles.append({"cycle": cycle + 1, **summarize(news_parser.last_report, wall, peak)})
+    finally:
+        news_parser.close()
+        server.shutdown()
+        os.unlink(csv_file)
+
+    result = {
+        "config": {
+            "feeds": args.feeds, "entries": args.entries, "fresh": args.fresh,
+            "parse_workers": args.parse_workers, "fetch_concurrency": args.fetch_concurrency,
+            "fetch_per_host": args.fetch_per_host,
+            "mongo": "mongod" if args.mongodb_uri else "mongomock",
+            "python": sys.version.split()[0],
+        },
+        "init_seconds": round(init_seconds, 3),
+        "cycles": cycles,
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Offline check of the share channels' 429 handling and connection reuse.
+
+Starts a local fake of the Twitter and Telegram endpoints that answers the
+first request with 429 (Twitter: x-rate-limit-* headers, Telegram:
+parameters.retry_after) and the rest with success, then points the sharers at
+it through TWITTER_API_URL / TELEGRAM_API_URL. The script fails if a 429 makes
+the caller sleep, does not pause the channel's token bucket, or if the
+follow-up request opens a new connection instead of reusing the pooled one.
+
+    python benchmarks/rate_limit_check.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESET_AFTER = 120  # sahte API'nin bildirdiği bekleme süresi (saniye)
+
+
+class FakeShareAPI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    calls = {"twitter": 0, "telegram": 0}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        channel = "telegram" if "/sendMessage" in self.path else "twitter"
+        self.calls[channel] += 1
+        first = self.calls[channel] == 1
+
+        if channel == "twitter":
+            headers = {"x-rate-limit-remaining": "0" if first else "5",
+                       "x-rate-limit-reset": str(int(time.time()) + RESET_AFTER)}
+            if first:
+                self._reply(429, {"title": "Too Many Requests"}, headers)
+            else:
+                self._reply(201, {"data": {"id": "1", "text": "ok"}}, headers)
+        elif first:
+            self._reply(429, {"ok": False, "error_code": 429,
+                              "parameters": {"retry_after": RESET_AFTER}})
+        else:
+            self._reply(200, {"ok": True, "result": {"message_id": 1}})
+
+
+def check(name, sharer, send):
+    start = time.monotonic()
+    first = send("deneme")
+    elapsed = time.monotonic() - start
+    wait = sharer.rate_limit.try_acquire()
+    result = {
+        "channel": name,
+        "first_response": first,
+        "first_call_seconds": round(elapsed, 3),
+        "bucket_wait_seconds": round(wait, 1),
+    }
+    # İkinci istek başarılı olmalı ve aynı keep-alive bağlantısını kullanmalı
+    result["second_response_ok"] = send("deneme") is not None
+    result["http"] = sharer.http.stats()
+    result["ok"] = (first is None and elapsed < 5 and wait > RESET_AFTER / 2
+                    and result["second_response_ok"] and result["http"]["connections_reused"] >= 1)
+    return result
+
+
+def main() -> int:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeShareAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    os.environ["TWITTER_API_URL"] = f"{base}/2/tweets"
+    os.environ["TELEGRAM_API_URL"] = base
+    for name in ("TWITTER_API_KEY", "TWITTER_API_SECRET", "TWITTER_ACCESS_TOKEN", "TWITTER_ACCESS_TOKEN_SECRET"):
+        os.environ.setdefault(name, "test")
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test")
+    os.environ.setdefault("TELEGRAM_CHANNEL_ID", "@test")
+
+    from src.telegram_share import TelegramShare
+    from src.twitter_share import TwitterShare
+
+    twitter = TwitterShare()
+    telegram = TelegramShare()
+    results = [
+        check("twitter", twitter, twitter.post_tweet),
+        check("telegram", telegram, telegram.send_message),
+    ]
+    server.shutdown()
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Startup-time benchmark for the worker (main.py) and the API (app.py).
+
+Every measurement runs in a fresh interpreter so module caches do not hide
+import cost. Results are printed as JSON; --max-import-seconds makes the
+script exit non-zero when a cold import regresses past the given budget.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --first-cycle   # MongoDB ve ağ erişimi gerekir
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+# Soğuk import'tan ilk parse döngüsünün bitişine kadar
+MAIN_FIRST_CYCLE_SNIPPET = """
+import os, time
+start = time.perf_counter()
+from src.news_parser import NewsParser
+parser = NewsParser(mongodb_uri=os.getenv("MONGODB_URI", "mongodb://localhost:27017"),
+                    csv_file=os.getenv("RSS_FILE", "rss_feed_list.csv"))
+parser.parse_feeds()
+print(time.perf_counter() - start)
+"""
+
+# Soğuk import'tan ilk HTTP yanıtına kadar
+APP_FIRST_REQUEST_SNIPPET = """
+import time
+start = time.perf_counter()
+from app import app
+app.test_client().get("/")
+print(time.perf_counter() - start)
+"""
+
+
+def run_snippet(snippet: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure(snippet: str, runs: int) -> dict:
+    samples = [run_snippet(snippet) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--first-cycle", action="store_true",
+                        help="also time main.py up to the end of the first parse cycle")
+    parser.add_argument("--max-import-seconds", type=float,
+                        help="fail if the median cold import of any module exceeds this")
+    args = parser.parse_args()
+
+    results = {
+        "import_main": measure(IMPORT_SNIPPET.format(module="main"), args.runs),
+        "import_app": measure(IMPORT_SNIPPET.format(module="app"), args.runs),
+        "app_first_request": measure(APP_FIRST_REQUEST_SNIPPET, args.runs),
+    }
+    if args.first_cycle:
+        results["main_first_cycle"] = measure(MAIN_FIRST_CYCLE_SNIPPET, 1)
+
+    print(json.dumps(results, indent=2))
+
+    if args.max_import_seconds is not None:
+        slow = [name for name in ("import_main", "import_app")
+                if results[name]["median"] > args.max_import_seconds]
+        if slow:
+            print(f"Import budget exceeded: {', '.join(slow)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
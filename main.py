@@ -1,8 +1,11 @@
 import os
 from src.news_parser import NewsParser
 from src.telegram_share import TelegramShare
+from src.twitter_share import TwitterShare
+from src.scheduler import Scheduler
+from src.poll_schedule import FeedPollScheduler
+from src import metrics
 import logging
-import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -11,25 +14,72 @@ def main():
     mongodb_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     csv_file = os.getenv("RSS_FILE", "rss_feed_list.csv")
     
-    parser = NewsParser(mongodb_uri=mongodb_uri, csv_file=csv_file)
-    telegram = TelegramShare(mongodb_uri=mongodb_uri)
-    
-    while True:
-        try:
-            # Haberleri parse et ve kaydet
-            parser.parse_feeds()
-            logger.info("Haberler başarıyla parse edildi")
-            
-            # Haberleri paylaş
-            telegram.share_latest_news()
-            
-            # Bir sonraki çalıştırmadan önce 30 dakika bekle
-            logger.info("Bir sonraki batch için 30 dakika bekleniyor...")
-            time.sleep(1800)  # 30 dakika
-            
-        except Exception as e:
-            logger.error(f"Ana döngüde hata: {str(e)}")
-            time.sleep(60)
+    # İşçi sürecinin metrikleri ayrı bir portta; profiler SIGUSR2 ile açılıp kapanır
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        metrics.start_http_server(int(metrics_port))
+    if metrics.profiler_enabled():
+        metrics.install_signal_toggle()
+    
+    parser = NewsParser(
+        mongodb_uri=mongodb_uri,
+        csv_file=csv_file,
+        fetch_concurrency=int(os.getenv("FETCH_CONCURRENCY", 16)),
+        fetch_per_host=int(os.getenv("FETCH_PER_HOST", 2)),
+        fetch_timeout=float(os.getenv("FETCH_TIMEOUT", 20)),
+        parse_workers=int(os.getenv("PARSE_WORKERS", 0)),
+        cluster_window_hours=float(os.getenv("CLUSTER_WINDOW_HOURS", 48))
+    )
+    
+    # Her iş kendi iş parçacığında ve kendi temposunda çalışır;
+    # paylaşımlar arasındaki bekleme parse döngüsünü durdurmaz
+    scheduler = Scheduler()
+    share_jobs = []
+    
+    telegram = TelegramShare(
+        mongodb_uri=mongodb_uri,
+        post_interval=float(os.getenv("TELEGRAM_POST_INTERVAL", 300)),
+        stop_event=scheduler.stop_event
+    )
+    scheduler.add_job("telegram", telegram.share_latest_news, float(os.getenv("TELEGRAM_SHARE_INTERVAL", 1800)))
+    share_jobs.append("telegram")
+    
+    # Twitter kimlik bilgileri tanımlıysa Twitter kanalını da çalıştır
+    if os.getenv("TWITTER_API_KEY"):
+        twitter = TwitterShare(
+            mongodb_uri=mongodb_uri,
+            post_interval=float(os.getenv("TWITTER_POST_INTERVAL", 300)),
+            stop_event=scheduler.stop_event
+        )
+        scheduler.add_job("twitter", twitter.share_latest_news, float(os.getenv("TWITTER_SHARE_INTERVAL", 1800)))
+        share_jobs.append("twitter")
+    
+    # Her feed, geçmiş yayın hızından öğrenilen kendi aralığıyla yoklanır
+    poll_schedule = FeedPollScheduler(
+        min_interval=float(os.getenv("POLL_MIN_INTERVAL", 120)),
+        max_interval=float(os.getenv("POLL_MAX_INTERVAL", os.getenv("PARSE_INTERVAL", 1800)))
+    )
+    try:
+        poll_schedule.learn(parser.collection, parser.feed_sources())
+    except Exception as e:
+        logger.error(f"Feed yayın hızları öğrenilemedi: {str(e)}")
+    
+    def ingest():
+        # Zamanı gelen feed'leri parse et ve kaydet; sıradaki feed'e kadar beklenecek süreyi döndür
+        delay = parser.poll_due_feeds(poll_schedule)
+        added = sum(timing["added"] for timing in parser.last_report)
+        # Yeni haber geldiyse paylaşım işlerini beklemeden uyandır
+        if added:
+            for name in share_jobs:
+                scheduler.trigger(name)
+        return max(1.0, delay)
+    
+    scheduler.add_job("ingest", ingest, poll_schedule.max_interval, retry_interval=60)
+    
+    try:
+        scheduler.run_forever()
+    finally:
+        parser.close()
 
 if __name__ == "__main__":
     main()
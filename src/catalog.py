@@ -0,0 +1,104 @@
+import logging
+from collections import Counter
+
+import pymongo
+
+logger = logging.getLogger(__name__)
+
+SOURCE = "source"
+CATEGORY = "category"
+
+
+def url_categories(url: str) -> list:
+    """Category candidates taken from the path segments of a news URL."""
+    # Örnek: https://t24.com.tr/rss/haber/gundem -> gundem
+    parts = (url or "").split("/")
+    candidates = []
+    if len(parts) >= 5:  # En az 5 parça olmalı (https://domain.com/rss/haber/kategori)
+        candidates.append(parts[-1])
+        if len(parts) >= 6:
+            candidates.append(parts[-2])
+    # Çok kısa ve anlamsız olabilecek parçaları temizle
+    return sorted({c.lower() for c in candidates if len(c) > 3 and not c.startswith("http")})
+
+
+class Catalog:
+    """Materialized source and category counts, updated at insert time."""
+
+    def __init__(self, db):
+        self.news = db.news
+        self.collection = db.catalog
+
+    @staticmethod
+    def _key(kind: str, name: str) -> str:
+        return f"{kind}:{name}"
+
+    def record(self, news_items: list) -> None:
+        """Increment counts for newly inserted news items."""
+        counts = Counter()
+        for item in news_items:
+            counts[(SOURCE, item["source"])] += 1
+            for category in item.get("categories", []):
+                counts[(CATEGORY, category)] += 1
+        if not counts:
+            return
+        self.collection.bulk_write([
+            pymongo.UpdateOne(
+                {"_id": self._key(kind, name)},
+                {"$inc": {"count": count}, "$setOnInsert": {"kind": kind, "name": name}},
+                upsert=True
+            )
+            for (kind, name), count in counts.items()
+        ], ordered=False)
+
+    def entries(self, kind: str) -> list:
+        """Catalog entries of one kind as {name, count} dicts sorted by name."""
+        cursor = self.collection.find({"kind": kind}, {"_id": 0, "name": 1, "count": 1}).sort("name", 1)
+        return list(cursor)
+
+    def names(self, kind: str) -> list:
+        return [entry["name"] for entry in self.entries(kind)]
+
+    def is_empty(self) -> bool:
+        return self.collection.find_one({}, {"_id": 1}) is None
+
+    def backfill_categories(self, batch_size: int = 500) -> int:
+        """Store the categories field on news saved before the catalog existed."""
+        updated = 0
+        operations = []
+        cursor = self.news.find({"categories": {"$exists": False}}, {"url": 1}).batch_size(batch_size)
+        for doc in cursor:
+            operations.append(pymongo.UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"categories": url_categories(doc.get("url"))}}
+            ))
+            if len(operations) >= batch_size:
+                updated += self.news.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += self.news.bulk_write(operations, ordered=False).modified_count
+        return updated
+
+    def rebuild(self) -> None:
+        """Recompute the whole catalog from the news collection."""
+        backfilled = self.backfill_categories()
+        if backfilled:
+            logger.info(f"Categories added to {backfilled} existing news")
+
+        operations = []
+        for kind, pipeline in (
+            (SOURCE, [{"$group": {"_id": "$source", "count": {"$sum": 1}}}]),
+            (CATEGORY, [{"$unwind": "$categories"},
+                        {"$group": {"_id": "$categories", "count": {"$sum": 1}}}]),
+        ):
+            for row in self.news.aggregate(pipeline, allowDiskUse=True):
+                if row["_id"] is None:
+                    continue
+                operations.append(pymongo.UpdateOne(
+                    {"_id": self._key(kind, row["_id"])},
+                    {"$set": {"kind": kind, "name": row["_id"], "count": row["count"]}},
+                    upsert=True
+                ))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        logger.info(f"Catalog rebuilt with {len(operations)} entries")
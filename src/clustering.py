@@ -0,0 +1,164 @@
+"""Near-duplicate story clustering with MinHash signatures and LSH banding.
+
+Every new item is hashed into a MinHash signature over the normalized terms
+of its title and lede. Signatures are split into bands; items sharing any
+band bucket are candidates, and the best candidate whose estimated Jaccard
+similarity passes the threshold gives the item its cluster_id. Lookups touch
+only the item's own buckets, so assignment cost does not grow with the
+window size. Entries older than the window are evicted.
+"""
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+from bson import ObjectId
+
+from src.keywords import turkish_stopwords
+from src.search import search_terms
+
+logger = logging.getLogger(__name__)
+
+# 2^32'den küçük en büyük asal; a*x + b uint64'e taşmadan sığar
+MERSENNE_PRIME = np.uint64((1 << 32) - 5)
+MAX_DESCRIPTION_TERMS = 30
+
+
+@lru_cache(maxsize=1)
+def _stop_terms() -> frozenset:
+    # Stop words, arama alanlarıyla aynı şekilde normalize edilir
+    return frozenset(term for word in turkish_stopwords() for term in search_terms(word))
+
+
+def shingles(search_title: str, search_description: str) -> set:
+    """Hashed term set of a news item, taken from its normalized search fields."""
+    stop_terms = _stop_terms()
+    terms = (search_title or "").split() + (search_description or "").split()[:MAX_DESCRIPTION_TERMS]
+    return {zlib.crc32(term.encode("utf-8")) for term in terms if len(term) > 2 and term not in stop_terms}
+
+
+class MinHasher:
+    """Universal-hash MinHash: h_i(x) = (a_i * x + b_i) mod p, vectorized with numpy."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, (1 << 32) - 5, size=num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.randint(0, (1 << 32) - 5, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, hashed_shingles: set) -> Optional[np.ndarray]:
+        if not hashed_shingles:
+            return None
+        x = np.fromiter(hashed_shingles, dtype=np.uint64, count=len(hashed_shingles))[None, :]
+        return ((self.a * x + self.b) % MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+
+class StoryClusterer:
+    """Rolling-window LSH index that assigns each new item to a story cluster."""
+
+    def __init__(self, window_hours: float = 48, num_perm: int = 64, bands: int = 32,
+                 threshold: float = 0.4):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.window = window_hours * 3600
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._buckets = {}  # (band, band bytes) -> {key}
+        self._entries = {}  # key -> (cluster_id, signature, band keys, timestamp)
+        self._order = deque()  # (timestamp, key)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def _evict(self, now: float) -> None:
+        while self._order and self._order[0][0] < now - self.window:
+            timestamp, key = self._order.popleft()
+            entry = self._entries.get(key)
+            # Sonradan yeniden eklenen bir anahtarın güncel girdisi silinmez
+            if entry is not None and entry[3] == timestamp:
+                self._remove(key)
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band_key in entry[2]:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def assign(self, key, search_title: str, search_description: str,
+               timestamp: float = None, cluster_id: ObjectId = None) -> ObjectId:
+        """Add an item to the index and return its cluster id.
+
+        An existing cluster_id (items loaded at startup) is kept as is;
+        otherwise the most similar indexed item's cluster is reused, or a
+        new cluster is opened.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        signature = self.hasher.signature(shingles(search_title, search_description))
+        if signature is None:
+            return cluster_id or ObjectId()
+        band_keys = self._band_keys(signature)
+
+        with self._lock:
+            self._evict(time.time())
+            if cluster_id is None:
+                candidates = set()
+                for band_key in band_keys:
+                    candidates.update(self._buckets.get(band_key, ()))
+                best_similarity = self.threshold
+                for candidate in candidates:
+                    candidate_cluster, candidate_signature = self._entries[candidate][:2]
+                    similarity = float(np.count_nonzero(candidate_signature == signature)) / len(signature)
+                    if similarity >= best_similarity:
+                        best_similarity = similarity
+                        cluster_id = candidate_cluster
+                cluster_id = cluster_id or ObjectId()
+
+            self._remove(key)
+            self._entries[key] = (cluster_id, signature, band_keys, timestamp)
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(key)
+            self._order.append((timestamp, key))
+        return cluster_id
+
+    def discard(self, key) -> None:
+        """Forget an item that was not stored after all (e.g. a duplicate URL)."""
+        with self._lock:
+            self._remove(key)
+
+    def warm(self, collection) -> int:
+        """Load the items of the current window from MongoDB."""
+        since = datetime.utcnow() - timedelta(seconds=self.window)
+        cursor = collection.find(
+            {"created_at": {"$gte": since.isoformat()}},
+            {"url": 1, "created_at": 1, "cluster_id": 1, "search_title": 1, "search_description": 1}
+        ).sort("created_at", 1)
+        loaded = 0
+        for doc in cursor:
+            try:
+                timestamp = (datetime.fromisoformat(doc["created_at"]) - datetime(1970, 1, 1)).total_seconds()
+            except (TypeError, ValueError):
+                timestamp = None
+            self.assign(doc["url"], doc.get("search_title", ""), doc.get("search_description", ""),
+                        timestamp=timestamp, cluster_id=doc.get("cluster_id"))
+            loaded += 1
+        return loaded
@@ -0,0 +1,204 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+import pymongo
+from pymongo import monitoring
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MONGODB_URI = "mongodb://localhost:27017"
+
+# Ortam değişkeni -> MongoClient parametresi
+_INT_SETTINGS = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+    "MONGO_SOCKET_TIMEOUT_MS": "socketTimeoutMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Collect connection pool counters from pymongo's CMAP events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = Counter()
+
+    def _inc(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        counters["open"] = counters.get("created", 0) - counters.get("closed", 0)
+        counters["in_use"] = counters.get("checked_out", 0) - counters.get("checked_in", 0)
+        return counters
+
+    def pool_created(self, event):
+        self._inc("pools_created")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._inc("pools_cleared")
+
+    def pool_closed(self, event):
+        self._inc("pools_closed")
+
+    def connection_created(self, event):
+        self._inc("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._inc("closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._inc("check_out_failed")
+
+    def connection_checked_out(self, event):
+        self._inc("checked_out")
+
+    def connection_checked_in(self, event):
+        self._inc("checked_in")
+
+
+pool_metrics = PoolMetrics()
+
+MONGO_COMMAND_SECONDS = metrics.histogram(
+    "mongo_command_seconds", "MongoDB command round trip time", ["command"]
+)
+MONGO_COMMAND_FAILURES = metrics.counter(
+    "mongo_command_failures", "MongoDB commands that returned an error", ["command"]
+)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Time every MongoDB command and total it per thread.
+
+    pymongo publishes command events on the thread that ran the command, so
+    a request handler can reset() before its work and read elapsed() after
+    it to get the time it spent waiting on MongoDB.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        self._local.seconds = 0.0
+
+    def elapsed(self) -> float:
+        return getattr(self._local, "seconds", 0.0)
+
+    def _record(self, event) -> float:
+        seconds = event.duration_micros / 1e6
+        self._local.seconds = self.elapsed() + seconds
+        MONGO_COMMAND_SECONDS.observe(seconds, command=event.command_name)
+        return seconds
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+        MONGO_COMMAND_FAILURES.inc(command=event.command_name)
+
+
+command_metrics = CommandMetrics()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def client_settings() -> dict:
+    """MongoClient keyword arguments taken from the environment."""
+    settings = {}
+    for env_name, option in _INT_SETTINGS.items():
+        value = os.getenv(env_name)
+        if value:
+            settings[option] = int(value)
+    read_preference = os.getenv("MONGO_READ_PREFERENCE")
+    if read_preference:
+        settings["readPreference"] = read_preference
+    return settings
+
+
+def get_client(mongodb_uri: str = None) -> pymongo.MongoClient:
+    """Return the process-wide MongoClient for the given URI, creating it once."""
+    uri = mongodb_uri or os.getenv("MONGODB_URI", DEFAULT_MONGODB_URI)
+    with _clients_lock:
+        client = _clients.get(uri)
+        if client is None:
+            client = pymongo.MongoClient(uri, event_listeners=[pool_metrics, command_metrics], **client_settings())
+            _clients[uri] = client
+        return client
+
+
+def get_db(mongodb_uri: str = None):
+    """news_db database on the shared client."""
+    return get_client(mongodb_uri).news_db
+
+
+def pool_stats() -> dict:
+    """Connection pool counters and the effective pool options."""
+    stats = pool_metrics.snapshot()
+    with _clients_lock:
+        clients = list(_clients.values())
+    stats["clients"] = len(clients)
+    if clients:
+        options = clients[0].options.pool_options
+        stats["max_pool_size"] = options.max_pool_size
+        stats["min_pool_size"] = options.min_pool_size
+    return stats
+
+
+metrics.gauge(
+    "mongo_pool_connections", "MongoDB pool connections by state", ["state"],
+    callback=lambda: {(state,): pool_metrics.snapshot().get(state, 0) for state in ("open", "in_use")}
+)
+
+
+GENERATION_ID = "news_generation"
+
+
+class Generation:
+    """Data version counter bumped by the parser after every insert batch."""
+
+    def __init__(self, db, check_interval: float = 5):
+        self.collection = db.meta
+        self.check_interval = check_interval
+        self._value = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def bump(self) -> None:
+        self.collection.update_one({"_id": GENERATION_ID}, {"$inc": {"value": 1}}, upsert=True)
+
+    def current(self) -> int:
+        """Current generation, re-read from MongoDB at most every check_interval seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._value is not None and now - self._checked_at < self.check_interval:
+                return self._value
+        doc = self.collection.find_one({"_id": GENERATION_ID})
+        with self._lock:
+            self._value = doc["value"] if doc else 0
+            self._checked_at = now
+            return self._value
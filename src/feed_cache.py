@@ -0,0 +1,70 @@
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Feed başına hatırlanan en fazla GUID/link sayısı
+MAX_SEEN_IDS = 500
+
+
+class FeedValidatorStore:
+    """Persist per-feed HTTP validators (ETag, Last-Modified, content hash) in MongoDB.
+
+    Each feed also keeps an entry high-water mark: the newest published
+    timestamp and a bounded list of recently seen GUIDs, used to drop
+    already ingested entries before any HTML cleanup or database access.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._cache: Dict[str, dict] = {}
+
+    def load(self) -> None:
+        """Load all stored validators into memory."""
+        self._cache = {doc["_id"]: doc for doc in self.collection.find({})}
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Conditional GET headers for the given feed URL."""
+        doc = self._cache.get(url)
+        if not doc:
+            return {}
+        headers = {}
+        if doc.get("etag"):
+            headers["If-None-Match"] = doc["etag"]
+        if doc.get("last_modified"):
+            headers["If-Modified-Since"] = doc["last_modified"]
+        return headers
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def is_unchanged(self, url: str, content: bytes) -> bool:
+        """Return True if the body is identical to the last processed one."""
+        doc = self._cache.get(url)
+        return bool(doc) and doc.get("content_hash") == self.content_hash(content)
+
+    def entry_state(self, url: str) -> Tuple[Optional[float], List[str]]:
+        """(newest published timestamp, recently seen entry ids) of a feed."""
+        doc = self._cache.get(url) or {}
+        return doc.get("high_water"), doc.get("seen_ids", [])
+
+    def save(self, url: str, headers: Dict[str, str], content: Optional[bytes],
+             feed_state: Optional[dict] = None) -> None:
+        """Remember validators (and the entry high-water mark) of a successfully processed response."""
+        doc = {
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "content_hash": self.content_hash(content) if content is not None else None,
+            "updated_at": datetime.utcnow()
+        }
+        if feed_state is not None:
+            doc["high_water"] = feed_state.get("high_water")
+            doc["seen_ids"] = feed_state.get("seen_ids", [])[:MAX_SEEN_IDS]
+        try:
+            self.collection.update_one({"_id": url}, {"$set": doc}, upsert=True)
+            self._cache[url] = {**self._cache.get(url, {}), "_id": url, **doc}
+        except Exception as e:
+            logger.error(f"Error saving feed validators for {url}: {str(e)}")
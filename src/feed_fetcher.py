@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+@dataclass
+class FetchResult:
+    """Result of downloading a single feed."""
+    url: str
+    status: Optional[int] = None
+    content: Optional[bytes] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and self.status < 400
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class FeedFetcher:
+    """Download RSS feeds concurrently with a pooled aiohttp client."""
+
+    def __init__(self, max_concurrency: int = 16, per_host_limit: int = 2,
+                 timeout: float = 20.0, user_agent: str = DEFAULT_USER_AGENT):
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.user_agent = user_agent
+
+    async def _fetch_one(self, session: aiohttp.ClientSession, url: str,
+                         headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        result = FetchResult(url=url)
+        start = time.monotonic()
+        try:
+            # Zaman aşımı bağlantı havuzunda beklemeyi de kapsar, yavaş bir kaynak döngüyü tutamaz
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                result.status = response.status
+                result.headers = {k.lower(): v for k, v in response.headers.items()}
+                result.content = await response.read()
+                if response.status >= 400:
+                    result.error = f"HTTP {response.status}"
+        except asyncio.TimeoutError:
+            result.error = f"timeout after {self.timeout}s"
+        except aiohttp.ClientError as e:
+            result.error = str(e) or e.__class__.__name__
+        finally:
+            result.elapsed = time.monotonic() - start
+        return result
+
+    async def _fetch_all(self, urls, request_headers) -> Dict[str, FetchResult]:
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host_limit)
+        headers = {"User-Agent": self.user_agent}
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            results = await asyncio.gather(*(self._fetch_one(session, url, request_headers.get(url)) for url in urls))
+        return {result.url: result for result in results}
+
+    def fetch_all(self, urls: Iterable[str],
+                  request_headers: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, FetchResult]:
+        """Fetch all given feed URLs concurrently and return results keyed by URL.
+
+        request_headers optionally maps a URL to extra headers (e.g. conditional GET validators).
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        if not unique_urls:
+            return {}
+        return asyncio.run(self._fetch_all(unique_urls, request_headers or {}))
@@ -0,0 +1,87 @@
+import html
+from html.parser import HTMLParser
+from typing import Optional, Tuple
+
+try:
+    import lxml.etree
+    import lxml.html
+    BACKEND = "lxml"
+except ImportError:  # lxml opsiyonel
+    BACKEND = "html.parser"
+
+# İçeriği görünür metin olmayan etiketler (BeautifulSoup.get_text de bunları atlar)
+SKIP_TAGS = ("script", "style", "template")
+
+
+class _TextAndImageParser(HTMLParser):
+    """Streaming tokenizer collecting text chunks and the first <img src>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.image = None
+        self._skip_depth = 0
+
+    def handle_startendtag(self, tag, attrs):
+        if self.image is None and tag == "img":
+            src = dict(attrs).get("src")
+            if src:
+                self.image = src
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        else:
+            self.handle_startendtag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        data = data.strip()
+        if data:
+            self.parts.append(data)
+
+
+def _extract_stdlib(markup: str) -> Tuple[str, Optional[str]]:
+    parser = _TextAndImageParser()
+    parser.feed(markup)
+    parser.close()
+    return " ".join(parser.parts), parser.image
+
+
+def _extract_lxml(markup: str) -> Tuple[str, Optional[str]]:
+    root = lxml.html.fragment_fromstring(markup, create_parent="div")
+    # Betik, stil ve yorumların metni itertext()'e girmesin; kuyruk metni korunur
+    lxml.etree.strip_elements(root, *SKIP_TAGS, lxml.etree.Comment, with_tail=False)
+    parts = [text.strip() for text in root.itertext()]
+    image = None
+    for img in root.iter("img"):
+        if img.get("src"):
+            image = img.get("src")
+            break
+    return " ".join(part for part in parts if part), image
+
+
+def extract_text_and_image(markup: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Return the visible text and the first image URL of an HTML fragment in one pass."""
+    if not markup:
+        return "", None
+    if "<" not in markup:
+        # Düz metin: ağaç kurmaya gerek yok
+        return (html.unescape(markup) if "&" in markup else markup).strip(), None
+    if BACKEND == "lxml":
+        try:
+            return _extract_lxml(markup)
+        except Exception:
+            # lxml bozuk parçaları reddedebilir, toleranslı tokenizer'a düş
+            pass
+    return _extract_stdlib(markup)
+
+
+def clean_text(markup: Optional[str]) -> str:
+    """Remove HTML tags from text."""
+    return extract_text_and_image(markup)[0]
@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+SHARE_REQUEST_SECONDS = metrics.histogram(
+    "share_http_request_seconds", "Share API request latency, including connect retries", ["channel"]
+)
+SHARE_REQUEST_ERRORS = metrics.counter(
+    "share_http_request_errors", "Share API requests that raised (timeouts, connection errors)", ["channel"]
+)
+
+
+class PooledSession(requests.Session):
+    """Keep-alive session of one share channel with default timeouts and reuse counters.
+
+    Only connection errors are retried: the request never reached the server,
+    so retrying a POST cannot double-post. Read timeouts and 5xx responses
+    are returned to the caller as failures.
+    """
+
+    def __init__(self, name: str, connect_timeout: float = 5, read_timeout: float = 30,
+                 pool_size: int = 4, connect_retries: int = 3):
+        super().__init__()
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(total=connect_retries, connect=connect_retries, read=0, status=0, redirect=0,
+                      backoff_factor=0.5, raise_on_status=False)
+        self.adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        self.mount("https://", self.adapter)
+        self.mount("http://", self.adapter)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._failures = 0
+        self._seconds = 0.0
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.monotonic()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.RequestException:
+            self._record(start, failed=True)
+            raise
+        self._record(start)
+        return response
+
+    def _record(self, start: float, failed: bool = False) -> None:
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._requests += 1
+            self._failures += failed
+            self._seconds += elapsed
+        SHARE_REQUEST_SECONDS.observe(elapsed, channel=self.name)
+        if failed:
+            SHARE_REQUEST_ERRORS.inc(channel=self.name)
+
+    def stats(self) -> dict:
+        """Request, latency and connection reuse counters of this session."""
+        pools = self.adapter.poolmanager.pools
+        connections = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+        with self._lock:
+            requests_made = self._requests
+            stats = {
+                "requests": requests_made,
+                "failures": self._failures,
+                "avg_latency_ms": round(1000 * self._seconds / requests_made, 1) if requests_made else 0.0,
+            }
+        stats["connections_opened"] = connections
+        stats["connections_reused"] = max(0, requests_made - stats["failures"] - connections)
+        return stats
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(channel: str) -> PooledSession:
+    """Process-wide pooled session of a share channel, configured from the environment."""
+    with _sessions_lock:
+        if channel not in _sessions:
+            _sessions[channel] = PooledSession(
+                channel,
+                connect_timeout=float(os.getenv("SHARE_CONNECT_TIMEOUT", 5)),
+                read_timeout=float(os.getenv("SHARE_READ_TIMEOUT", 30)),
+                pool_size=int(os.getenv("SHARE_POOL_SIZE", 4)),
+                connect_retries=int(os.getenv("SHARE_CONNECT_RETRIES", 3))
+            )
+        return _sessions[channel]
+
+
+def session_stats() -> dict:
+    with _sessions_lock:
+        sessions = dict(_sessions)
+    return {channel: session.stats() for channel, session in sessions.items()}
+
+
+# num_connections, havuzun o ana kadar kurduğu bağlantı sayısıdır (açık olanlar değil);
+# havuz yöneticisinden düşen havuzlar toplamdan çıktığı için sayaç değil gösterge
+metrics.gauge(
+    "share_http_connections_opened",
+    "Connections created so far by each share channel's live pools (not currently open ones)", ["channel"],
+    callback=lambda: {(channel,): stats["connections_opened"] for channel, stats in session_stats().items()}
+)
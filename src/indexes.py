@@ -0,0 +1,140 @@
+"""Declared MongoDB indexes and a query-plan check for the hot query shapes.
+
+    python -m src.indexes --ensure          # indeksleri oluştur
+    python -m src.indexes --check           # her sorgu şekli için explain(), COLLSCAN varsa hata
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime, timedelta
+
+import pymongo
+from bson import ObjectId
+from pymongo import IndexModel
+
+from src.search import SEARCH_FIELDS, SEARCH_INDEX_NAME
+from src.share_state import ShareState
+
+logger = logging.getLogger(__name__)
+
+# API'de sort_by yalnızca indeksli alanlarla yapılabilir
+SORTABLE_FIELDS = ("created_at", "last_updated")
+
+INDEXES = {
+    "news": [
+        IndexModel([("url", pymongo.ASCENDING)], unique=True, name="url_1"),
+        IndexModel([("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+                   name="created_at_id"),
+        IndexModel([("last_updated", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+                   name="last_updated_id"),
+        IndexModel([("source", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+                   name="source_created_at_id"),
+        IndexModel([("categories", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+                   name="categories_created_at_id"),
+        IndexModel([("shared", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+                   name="shared_created_at_id"),
+        # Türkçe normalize edilmiş alanlar üzerinde ağırlıklı metin indeksi
+        IndexModel([(field, pymongo.TEXT) for field in SEARCH_FIELDS], weights=SEARCH_FIELDS,
+                   default_language="none", name=SEARCH_INDEX_NAME),
+    ],
+    # Kanal/gün sayaçları _id ile okunur; eski günler TTL ile silinir
+    "share_quota": [
+        IndexModel([("expires_at", pymongo.ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    # Kanal başına hikâye kümesi rezervasyonları; _id = "<kanal>:<cluster_id>"
+    "share_clusters": [
+        IndexModel([("channel", pymongo.ASCENDING), ("news_id", pymongo.ASCENDING)], name="channel_news_id"),
+        IndexModel([("expires_at", pymongo.ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    "catalog": [
+        IndexModel([("kind", pymongo.ASCENDING), ("name", pymongo.ASCENDING)], name="kind_name"),
+    ],
+}
+
+
+def ensure_indexes(db) -> None:
+    """Create every declared index; existing ones are left untouched."""
+    for collection_name, models in INDEXES.items():
+        db[collection_name].create_indexes(models)
+
+
+def query_shapes() -> list:
+    """Representative instances of every query the services and the API run."""
+    now = datetime.utcnow()
+    day_ago = (now - timedelta(days=1)).isoformat()
+    newest = [("created_at", -1), ("_id", -1)]
+    return [
+        ("parser: url dedup", "news", {"url": {"$in": ["https://example.com/a"]}}, None),
+        ("share: claim candidate", "news",
+         {"source": "t24", "created_at": {"$gte": day_ago}, **ShareState(None, "telegram").unclaimed()},
+         [("created_at", -1)]),
+        ("share: legacy backfill", "news", {"shared": True, "share": {"$exists": False}}, None),
+        ("share: free cluster", "share_clusters", {"channel": "telegram", "news_id": ObjectId()}, None),
+        ("share: daily quota", "share_quota", {"_id": f"telegram:{now.strftime('%Y-%m-%d')}"}, None),
+        ("keywords: corpus refresh", "news", {"created_at": {"$gt": day_ago}}, [("created_at", 1)]),
+        ("api: news default", "news", {}, newest),
+        ("api: news by source", "news", {"source": "t24"}, newest),
+        ("api: news by sources", "news", {"source": {"$in": ["t24", "birgun"]}}, newest),
+        ("api: news by category", "news", {"categories": "gundem"}, newest),
+        ("api: news by date", "news", {"created_at": {"$gte": day_ago}}, newest),
+        ("api: news by shared", "news", {"shared": True}, newest),
+        ("api: news by last_updated", "news", {}, [("last_updated", -1), ("_id", -1)]),
+        ("api: search", "news", {"$text": {"$search": "ekonomi"}}, None),
+        ("api: catalog", "catalog", {"kind": "source"}, [("name", 1)]),
+    ]
+
+
+def _plan_stages(plan: dict) -> list:
+    """Flatten the stage names of an explain() plan tree."""
+    if "queryPlan" in plan:  # SBE motoru planı bir seviye daha sarar
+        plan = plan["queryPlan"]
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+def check_query_plans(db) -> list:
+    """Explain every query shape and report the winning plan stages."""
+    report = []
+    for name, collection_name, query_filter, sort in query_shapes():
+        cursor = db[collection_name].find(query_filter).limit(20)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = _plan_stages(plan)
+        report.append({"query": name, "stages": stages, "collscan": "COLLSCAN" in stages})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage and verify MongoDB indexes.")
+    parser.add_argument("--uri", default=None, help="MongoDB URI (varsayılan: MONGODB_URI)")
+    parser.add_argument("--ensure", action="store_true", help="create declared indexes")
+    parser.add_argument("--check", action="store_true", help="fail if any query shape uses COLLSCAN")
+    parser.add_argument("--backfill-search", action="store_true",
+                        help="add search fields to news stored without them (even if already done once)")
+    args = parser.parse_args()
+
+    from src.db import get_db
+    db = get_db(args.uri)
+
+    if args.ensure or args.check:
+        ensure_indexes(db)
+    if args.backfill_search:
+        from src.search import backfill_search_fields
+        print(f"Search fields added to {backfill_search_fields(db.news, force=True)} news")
+    if args.check:
+        report = check_query_plans(db)
+        print(json.dumps(report, indent=2))
+        failures = [entry["query"] for entry in report if entry["collscan"]]
+        if failures:
+            print(f"COLLSCAN in: {', '.join(failures)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
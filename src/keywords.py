@@ -0,0 +1,135 @@
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+# NLTK'nin Türkçe stop words listesi, indirme gerekmesin diye repoda tutulur
+STOPWORDS_FILE = os.path.join(os.path.dirname(__file__), "data", "turkish_stopwords.txt")
+
+
+@lru_cache(maxsize=None)
+def turkish_stopwords() -> frozenset:
+    """Türkçe stop words listesi."""
+    with open(STOPWORDS_FILE, encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+
+class KeywordExtractor:
+    """TF-IDF keyword extractor with IDF weights fitted on recent news titles.
+
+    Document frequencies are kept for a rolling window of titles and updated
+    incrementally from the news collection; results are memoized per news _id
+    so several share channels reuse the same hashtags.
+    """
+
+    def __init__(self, collection, stop_words=None, window_days: int = 7,
+                 refresh_interval: float = 900, cache_size: int = 2048):
+        self.collection = collection
+        self._stop_words = frozenset(stop_words) if stop_words is not None else None
+        self.window_days = window_days
+        self.refresh_interval = refresh_interval
+        self.cache_size = cache_size
+
+        self._df = Counter()
+        self._window = deque()  # (created_at, terms)
+        self._last_created_at = None
+        self._boundary_ids = set()  # _last_created_at anında sayılmış haberlerin _id'leri
+        self._last_refresh = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def stop_words(self) -> frozenset:
+        # Liste ilk tokenize çağrısında yüklenir
+        if self._stop_words is None:
+            self._stop_words = turkish_stopwords()
+        return self._stop_words
+
+    def tokenize(self, text: str) -> list:
+        text = re.sub(r'[^\w\s]', '', text or "").lower()  # Temizleme işlemi
+        stop_words = self.stop_words
+        return [token for token in TOKEN_PATTERN.findall(text) if token not in stop_words]
+
+    def refresh(self) -> None:
+        """Add titles inserted since the last refresh and expire old ones.
+
+        A parse_feeds call stamps all of its feeds with one created_at but
+        writes them one by one, so the last timestamp is re-read ($gte) and
+        the items already counted at it are skipped by _id.
+        """
+        window_start = (datetime.utcnow() - timedelta(days=self.window_days)).isoformat()
+        since = max(self._last_created_at or window_start, window_start)
+        cursor = self.collection.find(
+            {"created_at": {"$gte": since}},
+            {"title": 1, "created_at": 1}
+        ).sort("created_at", 1)
+
+        for doc in cursor:
+            if doc["created_at"] == self._last_created_at:
+                if doc["_id"] in self._boundary_ids:
+                    continue
+                self._boundary_ids.add(doc["_id"])
+            else:
+                self._last_created_at = doc["created_at"]
+                self._boundary_ids = {doc["_id"]}
+            terms = set(self.tokenize(doc.get("title")))
+            self._df.update(terms)
+            self._window.append((doc["created_at"], terms))
+
+        while self._window and self._window[0][0] < window_start:
+            _, terms = self._window.popleft()
+            self._df.subtract(terms)
+        self._df += Counter()  # sıfırlanan terimleri at
+        self._last_refresh = time.monotonic()
+
+    def _idf(self, term: str) -> float:
+        # scikit-learn'deki smooth_idf ile aynı formül
+        return math.log((1 + len(self._window)) / (1 + self._df.get(term, 0))) + 1
+
+    def extract(self, text: str, num_keywords: int = 5) -> list:
+        """Haber metninden önemli kelimeleri çıkar."""
+        tf = Counter(self.tokenize(text))
+        scores = {term: count * self._idf(term) for term, count in tf.items()}
+        return sorted(scores, key=scores.get, reverse=True)[:num_keywords]
+
+    def keywords_for(self, news: dict, num_keywords: int = 5) -> list:
+        """Keywords of a stored news item, memoized per _id."""
+        key = (str(news["_id"]), num_keywords)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+            if self._last_refresh is None or time.monotonic() - self._last_refresh > self.refresh_interval:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Anahtar kelime korpusu güncellenemedi: {str(e)}")
+
+            keywords = self.extract(news.get("title", ""), num_keywords)
+            self._cache[key] = keywords
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return keywords
+
+
+_extractors = {}
+_extractors_lock = threading.Lock()
+
+
+def get_keyword_extractor(collection) -> KeywordExtractor:
+    """Process-wide extractor shared by all share channels of a collection."""
+    key = (collection.database.name, collection.name)
+    with _extractors_lock:
+        if key not in _extractors:
+            _extractors[key] = KeywordExtractor(collection)
+        return _extractors[key]
@@ -0,0 +1,363 @@
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Saniye cinsinden; HTTP isteklerinden feed döngülerine kadar
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key: Tuple[str, ...], extra: Iterable[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def samples(self):
+        """(name suffix, label text, value) tuples of this metric."""
+        return []
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [("_total", self._label_text(key), value) for key, value in values]
+
+
+class Gauge(_Metric):
+    """Current value; either set directly or read from a callback at scrape time.
+
+    The callback returns {label values tuple: value}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Callable[[], Dict[Tuple, float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.callback is not None:
+            try:
+                values = {tuple(str(v) for v in key): value for key, value in self.callback().items()}
+            except Exception as e:
+                logger.error(f"Error collecting {self.name}: {str(e)}")
+                return []
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [("", self._label_text(key), value) for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency distribution with count and sum."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Etiket değerleri -> [kova sayıları..., toplam sayı, toplam süre]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def snapshot(self, **labels) -> Tuple[int, float]:
+        """(count, sum) of the observations with these labels."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return (state[-2], state[-1]) if state else (0, 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(state)) for key, state in sorted(self._values.items())]
+        samples = []
+        for key, state in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                samples.append(("_bucket", self._label_text(key, [("le", _format_value(bound))]), cumulative))
+            samples.append(("_bucket", self._label_text(key, [("le", "+Inf")]), state[-2]))
+            samples.append(("_count", self._label_text(key), state[-2]))
+            samples.append(("_sum", self._label_text(key), state[-1]))
+        return samples
+
+
+class Registry:
+    """Process-wide set of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              callback: Callable[[], Dict[Tuple, float]] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames, callback=callback)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class SamplingProfiler:
+    """Low-overhead wall-clock profiler that samples every thread's stack.
+
+    While running, a daemon thread reads sys._current_frames() every
+    `interval` seconds and counts identical stacks. collapsed() returns them
+    in the folded format flamegraph.pl and speedscope read. Nothing is
+    sampled until start() is called, so the hook can stay installed in
+    production and be switched on when needed.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._stacks = _Tally()
+        self._samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> bool:
+        """Start sampling; False if already running."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = _Tally()
+            self._samples = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+        return self.collapsed()
+
+    def profile(self, seconds: float) -> str:
+        """Sample for the given number of seconds and return the collapsed stacks."""
+        if not self.start():
+            raise RuntimeError("Profiler is already running")
+        time.sleep(seconds)
+        return self.stop()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stacks.append(";".join(reversed(stack)))
+            with self._lock:
+                self._stacks.update(stacks)
+                self._samples += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def toggle(self, output_file: str) -> None:
+        """Start sampling, or stop and write the collapsed stacks to output_file."""
+        if self.start():
+            logger.info("Sampling profiler started")
+            return
+        collapsed = self.stop()
+        with open(output_file, "w") as f:
+            f.write(collapsed)
+        logger.info(f"Sampling profiler stopped after {self._samples} samples, stacks written to {output_file}")
+
+
+profiler = SamplingProfiler(interval=float(os.getenv("PROFILER_INTERVAL", 0.01)))
+
+
+def profiler_enabled() -> bool:
+    return os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+
+
+def profile_seconds(value: Optional[str], default: float = 10, limit: float = 120) -> float:
+    try:
+        seconds = float(value) if value is not None else default
+    except ValueError:
+        seconds = default
+    return max(0.1, min(limit, seconds))
+
+
+def install_signal_toggle(signum=None, output_file: str = None) -> bool:
+    """Toggle the sampling profiler on a signal (SIGUSR2 by default); False where unsupported."""
+    import signal
+    signum = signum if signum is not None else getattr(signal, "SIGUSR2", None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    output_file = output_file or os.getenv("PROFILER_OUTPUT", f"/tmp/profile-{os.getpid()}.folded")
+    # Sinyal işleyicisi ana iş parçacığını bekletmesin diye dosya yazımı ayrı iş parçacığında
+    signal.signal(signum, lambda *_: threading.Thread(
+        target=profiler.toggle, args=(output_file,), daemon=True
+    ).start())
+    return True
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = CONTENT_TYPE) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            self._send(200, render())
+        elif url.path == "/debug/profile" and profiler_enabled():
+            seconds = profile_seconds(parse_qs(url.query).get("seconds", [None])[0])
+            try:
+                self._send(200, profiler.profile(seconds), "text/plain; charset=utf-8")
+            except RuntimeError as e:
+                self._send(409, f"{str(e)}\n", "text/plain; charset=utf-8")
+        else:
+            self._send(404, "Not found\n", "text/plain; charset=utf-8")
+
+
+def start_http_server(port: int, addr: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics (and /debug/profile when PROFILER_ENABLED) from a background thread."""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Metrics server listening on {addr}:{server.server_port}")
+    return server
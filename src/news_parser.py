@@ -1,101 +1,486 @@
 import pandas as pd
 import feedparser
+import calendar
 from datetime import datetime
-from bs4 import BeautifulSoup
 import pymongo
 import time
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from src import metrics
+from src.db import get_client, Generation
+from src.feed_fetcher import FeedFetcher, DEFAULT_USER_AGENT
+from src.feed_cache import FeedValidatorStore, MAX_SEEN_IDS
+from src.html_extract import extract_text_and_image, clean_text
+from src.search import search_fields, backfill_search_fields
+from src.indexes import ensure_indexes
+from src.catalog import Catalog, url_categories
+from src.clustering import StoryClusterer
+from src.poll_schedule import FeedPollScheduler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Feed başına aşama süreleri: fetch, feedparser, dedup, clean, write
+INGEST_STAGE_SECONDS = metrics.histogram("ingest_stage_seconds", "Per-feed time of each ingest stage", ["stage"])
+INGEST_CYCLE_SECONDS = metrics.histogram("ingest_cycle_seconds", "Wall time of a feed polling cycle")
+FEED_POLLS = metrics.counter(
+    "feed_polls", "Feed polls by outcome (ok, error, not_modified, unchanged)", ["source", "result"]
+)
+NEWS_ADDED = metrics.counter("news_added", "New news items stored", ["source"])
+NEWS_DUPLICATES = metrics.counter("news_duplicates", "Parsed entries that were already stored", ["source"])
+NEWS_SEEN = metrics.counter("news_seen_skipped", "Entries skipped by the feed high-water mark", ["source"])
+
+# Yüksek su işaretinden bu kadar eski olmayan girdiler GUID listesinde yoksa yine işlenir
+HIGH_WATER_GRACE = 6 * 3600
+# Bundan daha ileri tarihli girdiler (ör. yıl hatası) yüksek su işaretini ilerletmez
+MAX_CLOCK_SKEW = 3600
+
+
+def _entry_id(entry) -> str:
+    return entry.get("id") or entry.get("link", "")
+
+
+def _published_timestamp(entry):
+    published = entry.get("published_parsed") or entry.get("updated_parsed")
+    return calendar.timegm(published) if published else None
+
+
+def parse_feed_document(content: bytes, headers: dict, source_name: str, default_image: str,
+                        created_at: str, exclude_urls=None, high_water: float = None,
+                        seen_ids=None) -> tuple:
+    """Parse raw feed bytes into normalized news dicts.
+
+    Runs in worker processes, so it must stay a picklable module-level function.
+    Entries whose GUID is in seen_ids, or that were published well before the
+    feed's high_water timestamp, are dropped first. Future-dated entries are
+    processed but never move high_water. exclude_urls is an optional
+    callable returning already stored URLs for the rest. Both happen before
+    HTML cleanup. Returns (entry count, news items, stage seconds, feed state)
+    where stage seconds is {"feedparser", "dedup", "clean"} and feed state is
+    the updated {"high_water", "seen_ids", "skipped"}.
+    """
+    parse_start = time.monotonic()
+    feed = feedparser.parse(content, response_headers=headers)
+    stages = {"feedparser": time.monotonic() - parse_start}
+    
+    # Daha önce görülen girdiler hiçbir işlem yapılmadan atlanır
+    seen = set(seen_ids or ())
+    latest_allowed = time.time() + MAX_CLOCK_SKEW
+    if high_water is not None:
+        # Daha önce ileri tarihli bir girdiyle kaydedilmiş işaret de düzeltilir
+        high_water = min(high_water, latest_allowed)
+    fresh = []
+    fresh_ids = set()
+    newest = high_water
+    for entry in feed.entries:
+        published = _published_timestamp(entry)
+        entry_id = _entry_id(entry)
+        if entry_id in seen:
+            continue
+        if published is not None and high_water is not None and published < high_water - HIGH_WATER_GRACE:
+            continue
+        if published is not None and published <= latest_allowed and (newest is None or published > newest):
+            newest = published
+        fresh.append(entry)
+        fresh_ids.add(entry_id)
+    
+    # Yalnızca işlenen (ya da zaten görülmüş) girdiler kaydedilir; işaretle atlananlar değil
+    feed_ids = [_entry_id(entry) for entry in feed.entries]
+    kept_ids = [entry_id for entry_id in feed_ids if entry_id in fresh_ids or entry_id in seen]
+    feed_state = {
+        "high_water": newest,
+        # Feed'deki güncel girdiler önce, eski kayıtlar sınır dolana kadar
+        "seen_ids": list(dict.fromkeys(kept_ids + list(seen_ids or ())))[:MAX_SEEN_IDS],
+        "skipped": len(feed.entries) - len(fresh),
+    }
+    
+    # Var olan URL'ler HTML temizliğinden önce ayıklanır
+    fresh_urls = [entry.get("link", "") for entry in fresh]
+    dedup_start = time.monotonic()
+    skip_urls = set(exclude_urls(fresh_urls)) if exclude_urls and fresh_urls else set()
+    clean_start = time.monotonic()
+    stages["dedup"] = clean_start - dedup_start
+    news_items = []
+    
+    for entry in fresh:
+        url = entry.get("link", "")
+        if url in skip_urls:
+            continue
+        skip_urls.add(url)
+        
+        # Özet tek seferde parse edilir: metin ve ilk görsel birlikte
+        clean_description, description_image = extract_text_and_image(entry.get("summary", ""))
+        image_url = entry.get("media_content", [{}])[0].get("url") or description_image
+        
+        title = clean_text(entry.get("title"))
+        news_items.append({
+            "source": source_name,
+            "date": entry.get("published", ""),
+            "image": image_url if image_url else default_image,
+            "title": title,
+            "description": clean_description,
+            "created_at": created_at,
+            "url": url,
+            "last_updated": datetime.utcnow(),
+            "shared": False,
+            "categories": url_categories(url),
+            # Arama indeksi için Türkçe normalize edilmiş alanlar
+            **search_fields(title, clean_description)
+        })
+    
+    stages["clean"] = time.monotonic() - clean_start
+    return len(feed.entries), news_items, stages, feed_state
+
+
 class NewsParser:
-    def __init__(self, mongodb_uri: str, csv_file: str):
-        self.client = pymongo.MongoClient(mongodb_uri)
+    def __init__(self, mongodb_uri: str, csv_file: str, fetch_concurrency: int = 16,
+                 fetch_per_host: int = 2, fetch_timeout: float = 20.0, parse_workers: int = 0,
+                 cluster_window_hours: float = 48):
+        self.client = get_client(mongodb_uri)
         self.db = self.client.news_db
         self.collection = self.db.news
         self.csv_file = csv_file
         
-        # Create unique index on url field
-        self.collection.create_index([("url", pymongo.ASCENDING)], unique=True)
+        # Tanımlı indeksleri oluştur (url unique, sorgu şekilleri için bileşik ve metin indeksleri)
+        ensure_indexes(self.db)
+        # Arama alanları eski haberlere yalnızca bir kez eklenir (db.meta'daki işaret)
+        backfilled = backfill_search_fields(self.collection)
+        if backfilled:
+            logger.info(f"Search fields added to {backfilled} existing news")
+        
+        # Aynı haberi veren farklı kaynakların öğeleri tek bir cluster_id altında toplanır
+        self.clusterer = StoryClusterer(window_hours=cluster_window_hours)
+        try:
+            logger.info(f"Story clusterer warmed with {self.clusterer.warm(self.collection)} recent news")
+        except Exception as e:
+            logger.error(f"Error warming story clusterer: {str(e)}")
+        
+        # API yanıt önbelleğini geçersiz kılan veri nesli
+        self.generation = Generation(self.db)
+        
+        # Kaynak ve kategori sayıları ekleme anında güncellenir; katalog API'de değil burada kurulur
+        self.catalog = Catalog(self.db)
+        if self.catalog.is_empty():
+            self.catalog.rebuild()
+            # Boş katalogla önbelleğe alınmış API yanıtları geçersiz olsun
+            self.generation.bump()
         
         # Configure feedparser
-        feedparser.USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-
-    def _extract_image_from_description(self, description: str) -> str:
-        """Extract image URL from HTML description."""
-        soup = BeautifulSoup(description, "html.parser")
-        img_tag = soup.find("img")
-        if img_tag and img_tag.get("src"):
-            return img_tag["src"]
-        return None
-
-    def _clean_html(self, text: str) -> str:
-        """Remove HTML tags from text."""
-        soup = BeautifulSoup(text, "html.parser")
-        return soup.get_text(separator=" ", strip=True)
-
-    def parse_feeds(self) -> None:
-        """Parse all RSS feeds and save to MongoDB."""
+        feedparser.USER_AGENT = DEFAULT_USER_AGENT
+
+        # Feed'ler havuzlanmış bir HTTP istemcisiyle eşzamanlı indirilir
+        self.fetcher = FeedFetcher(
+            max_concurrency=fetch_concurrency,
+            per_host_limit=fetch_per_host,
+            timeout=fetch_timeout
+        )
+        self.last_report = []
+
+        # ETag / Last-Modified / içerik hash'i ile koşullu GET
+        self.validators = FeedValidatorStore(self.db.feed_validators)
+        self.validators.load()
+
+        # parse_workers > 0 ise feedparser ve HTML temizliği ayrı süreçlerde çalışır
+        self.parse_workers = parse_workers
+        self._executor = None
+
+    def _existing_urls(self, urls: list) -> set:
+        """Return the subset of URLs that are already stored."""
+        cursor = self.collection.find({"url": {"$in": urls}}, {"url": 1, "_id": 0})
+        return {doc["url"] for doc in cursor}
+
+    def _store_items(self, news_items: list) -> list:
+        """Upsert a batch of news items in one round trip and return the inserted ones."""
+        if not news_items:
+            return []
+        assigned = self._assign_clusters(news_items)
+        operations = [
+            pymongo.UpdateOne({"url": item["url"]}, {"$setOnInsert": item}, upsert=True)
+            for item in news_items
+        ]
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            inserted_indexes = list(result.upserted_ids)
+        except pymongo.errors.BulkWriteError as e:
+            # Aynı URL'yi eşzamanlı ekleyen başka bir süreç unique index hatası üretebilir
+            for err in e.details.get("writeErrors", []):
+                if err.get("code") != 11000:
+                    logger.error(f"Bulk write error: {err.get('errmsg')}")
+            inserted_indexes = [upsert["index"] for upsert in e.details.get("upserted", [])]
+        inserted = [news_items[index] for index in sorted(inserted_indexes)]
+        # Eklenmeyen (başka süreçte zaten eklenmiş) öğeler indeksten çıkarılır
+        inserted_urls = {item["url"] for item in inserted}
+        for url in assigned - inserted_urls:
+            self.clusterer.discard(url)
+        for item in inserted:
+            logger.debug(f"Added new news: {item['title']} from {item['source']}")
+        if inserted:
+            try:
+                self.catalog.record(inserted)
+            except Exception as e:
+                logger.error(f"Error updating catalog: {str(e)}")
+            try:
+                self.generation.bump()
+            except Exception as e:
+                logger.error(f"Error bumping data generation: {str(e)}")
+        return inserted
+
+    def _assign_clusters(self, news_items: list) -> set:
+        """Set cluster_id on items not yet in the clustering window; returns their URLs."""
+        assigned = set()
+        for item in news_items:
+            if item["url"] in self.clusterer:
+                continue
+            try:
+                item["cluster_id"] = self.clusterer.assign(
+                    item["url"], item.get("search_title", ""), item.get("search_description", "")
+                )
+                assigned.add(item["url"])
+            except Exception as e:
+                logger.error(f"Error clustering {item['url']}: {str(e)}")
+        return assigned
+
+    def _get_executor(self):
+        """Lazily create the parse worker pool, if enabled."""
+        if self.parse_workers > 0 and self._executor is None:
+            # Havuz, zamanlayıcı ve pymongo iş parçacıkları çalışırken oluşturulur; fork
+            # onların tuttuğu kilitleri (logging, pymongo) kopyalayacağından spawn kullanılır
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the parse worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _discard_executor(self) -> None:
+        """Drop a broken parse pool; the next cycle starts a fresh one."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _parse_in_process(self, jobs: list, current_time: str) -> None:
+        for row, result, timing, high_water, seen_ids in jobs:
+            try:
+                parsed = parse_feed_document(
+                    result.content, result.headers, row['source_name'], row['image_url'],
+                    current_time, exclude_urls=self._existing_urls,
+                    high_water=high_water, seen_ids=seen_ids
+                )
+                self._handle_parsed_feed(row, result, timing, parsed)
+            except Exception as e:
+                logger.error(f"Error processing feed {row['rss_url']}: {str(e)}")
+
+    def _parse_in_pool(self, executor, jobs: list, current_time: str) -> None:
+        """Parse in the worker pool and write in this process.
+
+        If a worker dies (e.g. OOM kill) the pool is broken for good: it is
+        discarded and the feeds not handled yet are parsed in this process.
+        """
+        handled = set()
+        try:
+            futures = {
+                executor.submit(
+                    parse_feed_document, result.content, result.headers,
+                    row['source_name'], row['image_url'], current_time,
+                    high_water=high_water, seen_ids=seen_ids
+                ): index
+                for index, (row, result, timing, high_water, seen_ids) in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                row, result, timing = jobs[index][:3]
+                try:
+                    self._handle_parsed_feed(row, result, timing, future.result())
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error processing feed {row['rss_url']}: {str(e)}")
+                handled.add(index)
+        except BrokenProcessPool as e:
+            pending = [job for index, job in enumerate(jobs) if index not in handled]
+            logger.error(f"Parse worker pool broke ({str(e)}), parsing {len(pending)} feeds in process")
+            self._discard_executor()
+            self._parse_in_process(pending, current_time)
+
+    def _handle_parsed_feed(self, row, result, timing: dict, parsed: tuple) -> None:
+        """Store the items of one parsed feed and update its report entry."""
+        entries, news_items, stages, feed_state = parsed
+        timing.update(stages)
+        timing["parse"] = sum(stages.values())
+        timing["entries"] = entries
+        timing["seen"] = feed_state["skipped"]
+        
+        if not entries:
+            logger.warning(f"No entries found for {row['rss_url']}")
+            return
+        
+        write_start = time.monotonic()
+        timing["added"] = len(self._store_items(news_items))
+        timing["duplicates"] = entries - timing["seen"] - timing["added"]
+        timing["write"] = time.monotonic() - write_start
+        
+        # Yüksek su işareti yalnızca haberler yazıldıktan sonra ilerler
+        self.validators.save(row['rss_url'], result.headers, result.content, feed_state)
+
+    def _record_metrics(self, report: list, cycle_seconds: float) -> None:
+        """Add the last cycle's per-feed results to the ingest metrics."""
+        INGEST_CYCLE_SECONDS.observe(cycle_seconds)
+        for timing in report:
+            source = timing["source"]
+            INGEST_STAGE_SECONDS.observe(timing["fetch"], stage="fetch")
+            if not timing["ok"]:
+                FEED_POLLS.inc(source=source, result="error")
+                continue
+            if timing["skipped"]:
+                FEED_POLLS.inc(source=source, result="not_modified" if timing["skipped"] == "304" else "unchanged")
+                continue
+            FEED_POLLS.inc(source=source, result="ok")
+            for stage in ("feedparser", "dedup", "clean", "write"):
+                if stage in timing:
+                    INGEST_STAGE_SECONDS.observe(timing[stage], stage=stage)
+            NEWS_ADDED.inc(timing["added"], source=source)
+            NEWS_DUPLICATES.inc(max(0, timing["duplicates"]), source=source)
+            NEWS_SEEN.inc(timing["seen"], source=source)
+
+    def _log_report(self, report: list, cycle_seconds: float) -> None:
+        """Log a one-line summary of the last cycle; per-feed timings at DEBUG."""
+        logger.info(
+            f"Feed cycle finished in {cycle_seconds:.2f}s: {len(report)} feeds, "
+            f"{sum(1 for t in report if not t['ok'])} errors, "
+            f"{sum(1 for t in report if t['skipped'])} unchanged, "
+            f"added={sum(t['added'] for t in report)} "
+            f"duplicates={sum(t['duplicates'] for t in report)} "
+            f"seen={sum(t['seen'] for t in report)}"
+        )
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = ["Per-feed timings:"]
+        for timing in sorted(report, key=lambda t: t["fetch"] + t["parse"] + t["write"], reverse=True):
+            lines.append(
+                f"  {timing['source']:<14} status={timing['status']} bytes={timing['bytes']} "
+                f"fetch={timing['fetch']:.2f}s parse={timing['parse']:.2f}s write={timing['write']:.2f}s "
+                f"entries={timing['entries']} seen={timing['seen']} added={timing['added']} "
+                f"duplicates={timing['duplicates']}"
+                + (f" skipped={timing['skipped']}" if timing["skipped"] else "")
+            )
+        logger.debug("\n".join(lines))
+
+    def load_feeds(self) -> pd.DataFrame:
+        """Feed list from the CSV file: rss_url, image_url, source_name."""
+        return pd.read_csv(self.csv_file, header=None, names=['rss_url', 'image_url', 'source_name'])
+
+    def feed_sources(self) -> dict:
+        """Feed URL -> source name."""
+        df = self.load_feeds()
+        return dict(zip(df['rss_url'], df['source_name']))
+
+    def parse_feeds(self, urls=None) -> int:
+        """Parse RSS feeds (all, or only the given feed URLs) and save to MongoDB.
+
+        Returns the number of new items; per-feed results are in last_report.
+        """
         try:
             # Updated CSV reading to include source name
-            df = pd.read_csv(self.csv_file, header=None, names=['rss_url', 'image_url', 'source_name'])
+            df = self.load_feeds()
+            if urls is not None:
+                df = df[df['rss_url'].isin(list(urls))]
             
             current_time = datetime.utcnow().isoformat()
+            cycle_start = time.monotonic()
+            
+            # Tüm feed'leri eşzamanlı indir, ardından parse aşamasına ver
+            urls = df['rss_url'].tolist()
+            results = self.fetcher.fetch_all(
+                urls,
+                request_headers={url: self.validators.request_headers(url) for url in urls}
+            )
+            report = []
+            jobs = []
             
             for _, row in df.iterrows():
-                try:
-                    feed = feedparser.parse(row['rss_url'])
-                    
-                    if not feed.entries:
-                        logger.warning(f"No entries found for {row['rss_url']}")
-                        continue
-                        
-                    for entry in feed.entries:
-                        # First check if URL already exists
-                        existing_news = self.collection.find_one({"url": entry.get("link", "")})
-                        
-                        if existing_news:
-                            logger.info(f"News already exists: {entry.get('title')} from {row['source_name']}")
-                            continue
-                            
-                        description_html = entry.get("summary", "")
-                        clean_description = self._clean_html(description_html)
-                        image_url = (entry.get("media_content", [{}])[0].get("url") or 
-                                   self._extract_image_from_description(description_html))
-                        
-                        news_item = {
-                            "source": row['source_name'],
-                            "date": entry.get("published", ""),
-                            "image": image_url if image_url else row['image_url'],
-                            "title": self._clean_html(entry.get("title")),
-                            "description": clean_description,
-                            "created_at": current_time,
-                            "url": entry.get("link", ""),
-                            "last_updated": datetime.utcnow(),
-                            "shared": False
-                        }
-                        
-                        # Insert only if URL doesn't exist
-                        try:
-                            self.collection.insert_one(news_item)
-                            logger.info(f"Added new news: {news_item['title']} from {row['source_name']}")
-                        except pymongo.errors.DuplicateKeyError:
-                            logger.info(f"Duplicate URL found, skipping: {news_item['url']}")
-                        
-                except Exception as e:
-                    logger.error(f"Error processing feed {row['rss_url']}: {str(e)}")
+                result = results[row['rss_url']]
+                timing = {
+                    "url": row['rss_url'],
+                    "source": row['source_name'],
+                    "ok": result.ok,
+                    "status": result.status,
+                    "bytes": len(result.content or b""),
+                    "fetch": result.elapsed,
+                    "parse": 0.0,
+                    "write": 0.0,
+                    "entries": 0,
+                    "seen": 0,
+                    "added": 0,
+                    "duplicates": 0,
+                    "skipped": None
+                }
+                report.append(timing)
+                
+                if not result.ok:
+                    logger.error(f"Error fetching feed {row['rss_url']}: {result.error}")
+                    continue
+                
+                # Değişmemiş feed'ler hiç parse edilmez
+                if result.not_modified:
+                    timing["skipped"] = "304"
+                    continue
+                if self.validators.is_unchanged(row['rss_url'], result.content):
+                    timing["skipped"] = "unchanged"
+                    continue
+                
+                jobs.append((row, result, timing, *self.validators.entry_state(row['rss_url'])))
+            
+            executor = self._get_executor()
+            if executor is None:
+                self._parse_in_process(jobs, current_time)
+            else:
+                # Parse işçilerde, MongoDB yazımları ana süreçte
+                self._parse_in_pool(executor, jobs, current_time)
+            
+            self.last_report = report
+            cycle_seconds = time.monotonic() - cycle_start
+            self._record_metrics(report, cycle_seconds)
+            self._log_report(report, cycle_seconds)
                     
             logger.info("Feed parsing completed successfully")
+            return sum(timing["added"] for timing in report)
             
         except Exception as e:
             logger.error(f"Fatal error in parse_feeds: {str(e)}")
             raise
 
+    def poll_due_feeds(self, poll_schedule) -> float:
+        """Parse the feeds that are due, record their results and return the delay until the next one."""
+        poll_schedule.sync(self.feed_sources())
+        urls = poll_schedule.due()
+        self.last_report = []
+        if urls:
+            try:
+                self.parse_feeds(urls)
+            except Exception:
+                # Yoklama kaybolmasın: hata olarak kaydedilip geri çekilme ile yeniden planlanır
+                for url in urls:
+                    poll_schedule.record(url, 0, ok=False)
+                raise
+            for timing in self.last_report:
+                poll_schedule.record(timing["url"], timing["added"], ok=timing["ok"])
+        return poll_schedule.next_delay()
+
     def run_periodic(self, interval_seconds: int = 3600):
-        """Run the parser periodically."""
+        """Run the parser, polling each feed at its own learned rate (at most every interval_seconds)."""
+        poll_schedule = FeedPollScheduler(max_interval=interval_seconds)
+        poll_schedule.learn(self.collection, self.feed_sources())
         while True:
             logger.info("Starting news parsing cycle")
-            self.parse_feeds()
-            logger.info(f"Sleeping for {interval_seconds} seconds")
-            time.sleep(interval_seconds) 
\ No newline at end of file
+            try:
+                delay = self.poll_due_feeds(poll_schedule)
+            except Exception:
+                delay = 60
+            logger.info(f"Sleeping for {delay:.0f} seconds")
+            time.sleep(delay) 
\ No newline at end of file
@@ -0,0 +1,75 @@
+import base64
+import threading
+import time
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from bson.json_util import dumps, loads
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(sort_value, doc_id) -> str:
+    """Opaque cursor pointing after a document with the given sort key."""
+    payload = dumps({"v": sort_value, "i": doc_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[object, ObjectId]:
+    """Return (sort value, _id) stored in a cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return payload["v"], payload["i"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(str(e))
+
+
+def keyset_filter(sort_by: str, sort_order: int, cursor: Optional[str]) -> dict:
+    """Filter selecting documents strictly after the cursor in (sort_by, _id) order."""
+    if not cursor:
+        return {}
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$lt" if sort_order < 0 else "$gt"
+    return {
+        "$or": [
+            {sort_by: {op: sort_value}},
+            {sort_by: sort_value, "_id": {op: doc_id}}
+        ]
+    }
+
+
+def next_cursor(last_document: Optional[dict], returned: int, sort_by: str, limit: int) -> Optional[str]:
+    """Cursor for the page after the one ending with last_document, or None on the last page."""
+    if last_document is None or returned < limit:
+        return None
+    return encode_cursor(last_document.get(sort_by), last_document["_id"])
+
+
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def cached_count(collection, query_filter: dict, ttl: float = 60) -> int:
+    """count_documents result cached for ttl seconds per filter.
+
+    An empty filter uses the collection metadata count instead of a scan.
+    """
+    if not query_filter:
+        return collection.estimated_document_count()
+    key = (collection.full_name, dumps(query_filter, sort_keys=True))
+    now = time.monotonic()
+    with _count_cache_lock:
+        entry = _count_cache.get(key)
+        if entry and now - entry[1] < ttl:
+            return entry[0]
+    count = collection.count_documents(query_filter)
+    with _count_cache_lock:
+        _count_cache[key] = (count, now)
+        # Süresi dolan girdileri temizle
+        if len(_count_cache) > 1024:
+            for stale in [k for k, v in _count_cache.items() if now - v[1] >= ttl]:
+                del _count_cache[stale]
+    return count
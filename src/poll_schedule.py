@@ -0,0 +1,127 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FeedPollScheduler:
+    """Priority queue of feed URLs ordered by their next poll time.
+
+    Each feed's poll interval is 1 / (expected new items per second), learned
+    from stored created_at history and refined with an EWMA of what each poll
+    returns, clamped to [min_interval, max_interval]. Feeds that error or
+    return nothing back off exponentially up to max_interval.
+    """
+
+    def __init__(self, min_interval: float = 120, max_interval: float = 3600,
+                 backoff_factor: float = 2.0, smoothing: float = 0.3):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.smoothing = smoothing
+        self._heap: List[Tuple[float, str]] = []
+        self._next_poll: Dict[str, float] = {}
+        self._rate: Dict[str, float] = {}  # saniyede beklenen yeni haber
+        self._misses: Dict[str, int] = {}
+        self._last_new: Dict[str, float] = {}  # son yeni haber gelen (ya da ilk) yoklama
+        self._lock = threading.Lock()
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def base_interval(self, url: str) -> float:
+        rate = self._rate.get(url)
+        return self._clamp(1 / rate) if rate else self.max_interval
+
+    def interval(self, url: str) -> float:
+        """Current poll interval of a feed, including error/empty backoff."""
+        return self._clamp(self.base_interval(url) * self.backoff_factor ** self._misses.get(url, 0))
+
+    def _schedule(self, url: str, when: float) -> None:
+        self._next_poll[url] = when
+        heapq.heappush(self._heap, (when, url))
+
+    def sync(self, urls: Iterable[str]) -> None:
+        """Track exactly the given feeds; new ones are due immediately."""
+        urls = set(urls)
+        now = time.time()
+        with self._lock:
+            for url in urls - set(self._next_poll):
+                self._schedule(url, now)
+            for url in set(self._next_poll) - urls:
+                # Yığındaki eski kayıtlar due() sırasında atlanır
+                del self._next_poll[url]
+
+    def learn(self, collection, feeds: Dict[str, str], window_days: int = 7) -> None:
+        """Estimate each feed's publish rate from the news stored in the last window_days.
+
+        feeds maps feed URL -> source name.
+        """
+        since = (datetime.utcnow() - timedelta(days=window_days)).isoformat()
+        counts = {
+            row["_id"]: row["count"]
+            for row in collection.aggregate([
+                {"$match": {"created_at": {"$gte": since}}},
+                {"$group": {"_id": "$source", "count": {"$sum": 1}}},
+            ])
+        }
+        feeds_per_source = {}
+        for source in feeds.values():
+            feeds_per_source[source] = feeds_per_source.get(source, 0) + 1
+        window = window_days * 86400
+        with self._lock:
+            for url, source in feeds.items():
+                count = counts.get(source, 0)
+                if count:
+                    self._rate[url] = count / feeds_per_source[source] / window
+        logger.info("Learned poll intervals: " + ", ".join(
+            f"{source}={self.base_interval(url):.0f}s" for url, source in feeds.items()
+        ))
+
+    def due(self, now: float = None) -> List[str]:
+        """Remove and return every feed whose poll time has come."""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                when, url = heapq.heappop(self._heap)
+                if self._next_poll.get(url) == when:
+                    due.append(url)
+        return due
+
+    def record(self, url: str, added: int, ok: bool = True, now: float = None) -> float:
+        """Update a feed after a poll and schedule its next one; returns the interval."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if url not in self._next_poll:
+                return 0.0
+            last = self._last_new.get(url)
+            if last is None or (ok and added):
+                self._last_new[url] = now
+            if ok and added:
+                if last is not None:
+                    # Aradaki boş yoklamaların süresi de gözlenen hıza dahil
+                    observed = added / max(now - last, 1.0)
+                    previous = self._rate.get(url, observed)
+                    self._rate[url] = self.smoothing * observed + (1 - self.smoothing) * previous
+                self._misses[url] = 0
+            else:
+                # Hata veya boş sonuç: üstel geri çekilme
+                self._misses[url] = self._misses.get(url, 0) + 1
+            interval = self.interval(url)
+            self._schedule(url, now + interval)
+            return interval
+
+    def next_delay(self, now: float = None) -> float:
+        """Seconds until the next feed is due."""
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._heap and self._next_poll.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return self.max_interval
+            return max(0.0, self._heap[0][0] - now)
@@ -0,0 +1,126 @@
+import heapq
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Non-blocking token bucket that can also be paused by platform rate-limit headers."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # saniyede eklenen jeton
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = 0.0  # time.time() cinsinden
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token will be available, without consuming one."""
+        with self._lock:
+            self._refill()
+            blocked = max(0.0, self.blocked_until - time.time())
+            missing = max(0.0, 1 - self.tokens)
+            if not missing:
+                return blocked
+            return max(blocked, missing / self.rate if self.rate else float("inf"))
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available; otherwise return how long to wait. Never sleeps."""
+        with self._lock:
+            self._refill()
+            blocked = self.blocked_until - time.time()
+            if blocked > 0:
+                return blocked
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate if self.rate else float("inf")
+
+    def block_until(self, timestamp: float) -> None:
+        """Refuse tokens until the given unix timestamp."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, timestamp)
+            self.tokens = 0
+
+    def block_for(self, seconds: float) -> None:
+        self.block_until(time.time() + seconds)
+
+    def update_from_headers(self, remaining: Optional[str], reset: Optional[str]) -> None:
+        """Apply x-rate-limit-remaining / x-rate-limit-reset style headers."""
+        try:
+            if remaining is not None and int(remaining) <= 0 and reset is not None:
+                self.block_until(float(reset))
+            elif remaining is not None:
+                with self._lock:
+                    self.tokens = min(self.tokens, float(remaining))
+        except ValueError:
+            logger.warning(f"Geçersiz rate limit başlıkları: remaining={remaining} reset={reset}")
+
+
+class RetryQueue:
+    """Items to re-post later with exponential backoff, ordered by due time."""
+
+    def __init__(self, base_delay: float = 30, max_delay: float = 3600, max_attempts: int = 5):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._heap = []
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def push(self, item_id, min_delay: float = 0) -> bool:
+        """Requeue an item; returns False once it has used up its attempts."""
+        with self._lock:
+            attempt = self._attempts.get(item_id, 0) + 1
+            if attempt > self.max_attempts:
+                self._attempts.pop(item_id, None)
+                return False
+            self._attempts[item_id] = attempt
+            delay = max(min_delay, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+            heapq.heappush(self._heap, (time.time() + delay, str(item_id), item_id))
+            return True
+
+    def pop_due(self) -> list:
+        """Remove and return every item whose retry time has come."""
+        now = time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def done(self, item_id) -> None:
+        with self._lock:
+            self._attempts.pop(item_id, None)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def permanent_error(status_code) -> bool:
+    """True for API responses that will fail the same way if retried (4xx other than 408/425/429).
+
+    None (no response: timeout, connection error) and 5xx are transient.
+    """
+    return status_code is not None and 400 <= status_code < 500 and status_code not in (408, 425, 429)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(channel: str, rate: float, capacity: float) -> TokenBucket:
+    """Process-wide token bucket of a share channel."""
+    with _buckets_lock:
+        if channel not in _buckets:
+            _buckets[channel] = TokenBucket(rate, capacity)
+        return _buckets[channel]
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request
+
+from src.db import Generation
+
+logger = logging.getLogger(__name__)
+
+
+class RedisStore:
+    """Optional shared backend so several API workers reuse each other's entries."""
+
+    def __init__(self, url: str, ttl: float):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key: str):
+        value = self.client.get(f"resp:{key}")
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return etag.decode("ascii"), body
+
+    def set(self, key: str, etag: str, body: bytes) -> None:
+        self.client.set(f"resp:{key}", etag.encode("ascii") + b"\n" + body, ex=int(self.ttl))
+
+
+class ResponseCache:
+    """In-process LRU with TTL for JSON responses, keyed by data generation and query."""
+
+    def __init__(self, generation: Generation, maxsize: int = 512, ttl: float = 300, store=None):
+        self.generation = generation
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, generation: Generation) -> "ResponseCache":
+        ttl = float(os.getenv("RESPONSE_CACHE_TTL", 300))
+        store = None
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            try:
+                store = RedisStore(redis_url, ttl)
+            except ImportError:
+                logger.warning("REDIS_URL tanımlı ama redis paketi kurulu değil, yalnızca yerel önbellek kullanılacak")
+        return cls(generation, maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", 512)), ttl=ttl, store=store)
+
+    @staticmethod
+    def request_key() -> str:
+        # Parametre sırası farklı olan aynı sorgular aynı anahtarı kullanır
+        args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        return f"{request.path}?{args}"
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[2] < self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[0], entry[1]
+                del self._entries[key]
+        if self.store is not None:
+            try:
+                cached = self.store.get(key)
+            except Exception as e:
+                logger.error(f"Paylaşılan önbellek okunamadı: {str(e)}")
+                return None
+            if cached is not None:
+                self._put_local(key, *cached)
+            return cached
+        return None
+
+    def _put_local(self, key: str, etag: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (etag, body, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, etag: str, body: bytes) -> None:
+        self._put_local(key, etag, body)
+        if self.store is not None:
+            try:
+                self.store.set(key, etag, body)
+            except Exception as e:
+                logger.error(f"Paylaşılan önbelleğe yazılamadı: {str(e)}")
+
+    def _tee(self, key: str, etag: str, chunks):
+        """Yield a streamed body to the client and cache it once it has been sent in full."""
+        parts = []
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                parts.append(chunk)
+                yield chunk
+            # Yarıda kalan (hata, istemci bağlantıyı kesti) yanıtlar önbelleğe yazılmaz
+            self.set(key, etag, b"".join(parts))
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def cached(self, view):
+        """Decorator serving a view from cache with ETag / 304 support.
+
+        Streamed responses are not buffered on a miss: chunks go to the client
+        as they are produced and are cached when the stream ends. Their ETag
+        is weak and derived from the cache key (data generation + query),
+        since it has to be sent before the body exists.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                key = f"{self.generation.current()}:{self.request_key()}"
+            except Exception as e:
+                logger.error(f"Önbellek nesli okunamadı: {str(e)}")
+                return view(*args, **kwargs)
+
+            cached = self.get(key)
+            if cached is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if response.is_streamed:
+                    etag = "W/" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+                    response.response = self._tee(key, etag, response.response)
+                else:
+                    body = response.get_data()
+                    etag = hashlib.sha1(key.encode("utf-8") + body).hexdigest()
+                    self.set(key, etag, body)
+            else:
+                etag, body = cached
+                response = make_response(body)
+                response.mimetype = "application/json"
+
+            weak = etag.startswith("W/")
+            tag = etag[2:] if weak else etag
+            response.set_etag(tag, weak=weak)
+            response.headers["Cache-Control"] = "no-cache"
+            # If-None-Match zayıf karşılaştırma kullanır (RFC 7232)
+            if request.if_none_match.contains_weak(tag):
+                # Akıtılmayacak gövdenin cursor'ını kapat
+                close = getattr(response.response, "close", None)
+                if close is not None:
+                    close()
+                response.status_code = 304
+                response.set_data(b"")
+            return response
+        return wrapper
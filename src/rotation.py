@@ -0,0 +1,100 @@
+import csv
+import logging
+import os
+import threading
+import time
+
+from pymongo import ReturnDocument
+
+from src.catalog import SOURCE, Catalog
+
+logger = logging.getLogger(__name__)
+
+
+def csv_sources(csv_file: str) -> list:
+    """Source names from the third column of the RSS feed list."""
+    with open(csv_file, newline="", encoding="utf-8") as f:
+        return sorted({row[2].strip() for row in csv.reader(f) if len(row) >= 3 and row[2].strip()})
+
+
+def weighted_schedule(weights: dict) -> list:
+    """Smooth weighted round-robin order: a source with weight 3 gets 3 evenly spread slots."""
+    current = {name: 0 for name in sorted(weights)}
+    total = sum(weights.values())
+    schedule = []
+    for _ in range(total):
+        for name in current:
+            current[name] += weights[name]
+        best = max(current, key=current.get)
+        current[best] -= total
+        schedule.append(best)
+    return schedule
+
+
+class SourceRotation:
+    """Per-channel round-robin over news sources backed by one cursor document.
+
+    The source list comes from the catalog (or the CSV feed list) and is
+    cached in memory; picking the next sources is a single atomic $inc on
+    db.source_rotation, so parallel workers of a channel get disjoint slots
+    and channels no longer disturb each other's rotation.
+    """
+
+    def __init__(self, db, channel: str, weighted: bool = False, max_weight: int = 4,
+                 csv_file: str = None, refresh_interval: float = 600):
+        self.collection = db.source_rotation
+        self.catalog = Catalog(db)
+        self.channel = channel
+        self.weighted = weighted
+        self.max_weight = max_weight
+        self.csv_file = csv_file or os.getenv("RSS_FILE", "rss_feed_list.csv")
+        self.refresh_interval = refresh_interval
+        self._schedule = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _weights(self) -> dict:
+        entries = self.catalog.entries(SOURCE)
+        if not entries:
+            # Katalog henüz oluşmadıysa CSV'deki kaynaklar eşit ağırlıkla kullanılır
+            return {name: 1 for name in csv_sources(self.csv_file)}
+        if not self.weighted:
+            return {entry["name"]: 1 for entry in entries}
+        # Haber hacmiyle orantılı, 1..max_weight aralığında ağırlık
+        top = max(entry.get("count", 0) for entry in entries) or 1
+        return {
+            entry["name"]: 1 + round((self.max_weight - 1) * entry.get("count", 0) / top)
+            for entry in entries
+        }
+
+    def schedule(self) -> list:
+        """Cached rotation order, rebuilt every refresh_interval seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded_at is not None and now - self._loaded_at < self.refresh_interval:
+                return self._schedule
+        schedule = weighted_schedule(self._weights())
+        with self._lock:
+            self._schedule = schedule
+            self._loaded_at = now
+        return schedule
+
+    def next_sources(self, limit: int = 4) -> list:
+        """Take the next `limit` slots of the rotation for this channel."""
+        try:
+            schedule = self.schedule()
+            if not schedule:
+                return []
+            if not self.weighted:
+                limit = min(limit, len(schedule))
+            doc = self.collection.find_one_and_update(
+                {"_id": self.channel},
+                {"$inc": {"position": limit}},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+            start = doc.get("position", 0) if doc else 0
+            return [schedule[(start + i) % len(schedule)] for i in range(limit)]
+        except Exception as e:
+            logger.error(f"Kaynak seçiminde hata: {str(e)}")
+            return []
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_SECONDS = metrics.histogram("job_duration_seconds", "Run time of each scheduler job", ["job"])
+JOB_FAILURES = metrics.counter("job_failures", "Scheduler job runs that raised", ["job"])
+
+
+class PeriodicJob:
+    """A job run on its own worker thread every `interval` seconds.
+
+    If the job function returns a number it is used as the delay before the
+    next run instead of the fixed interval. A failed run is retried after
+    `retry_interval` seconds.
+    """
+
+    def __init__(self, name: str, func: Callable, interval: float, initial_delay: float = 0,
+                 retry_interval: float = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.retry_interval = interval if retry_interval is None else retry_interval
+        self.wake = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = 0.0
+
+
+class Scheduler:
+    """Run ingestion and share channels as independent periodic jobs."""
+
+    def __init__(self):
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self.stop_event = threading.Event()
+
+    def add_job(self, name: str, func: Callable, interval: float, initial_delay: float = 0,
+                retry_interval: float = None) -> PeriodicJob:
+        job = PeriodicJob(name, func, interval, initial_delay, retry_interval)
+        self.jobs[name] = job
+        return job
+
+    def trigger(self, name: str) -> None:
+        """Run a job as soon as its current run (if any) finishes."""
+        job = self.jobs.get(name)
+        if job:
+            job.wake.set()
+
+    def _wait(self, job: PeriodicJob, seconds: float) -> None:
+        job.wake.wait(max(0.0, seconds))
+        job.wake.clear()
+
+    def _run(self, job: PeriodicJob) -> None:
+        if job.initial_delay:
+            self._wait(job, job.initial_delay)
+        while not self.stop_event.is_set():
+            start = time.monotonic()
+            delay = job.interval
+            try:
+                result = job.func()
+                if isinstance(result, (int, float)) and not isinstance(result, bool):
+                    delay = result
+            except Exception as e:
+                job.failures += 1
+                JOB_FAILURES.inc(job=job.name)
+                delay = job.retry_interval
+                logger.error(f"{job.name} işinde hata: {str(e)}")
+            job.runs += 1
+            job.last_duration = time.monotonic() - start
+            JOB_SECONDS.observe(job.last_duration, job=job.name)
+            if self.stop_event.is_set():
+                break
+            logger.info(f"{job.name} {job.last_duration:.1f}s sürdü, sonraki çalıştırma {delay:.0f}s sonra")
+            self._wait(job, delay)
+
+    def start(self) -> None:
+        for job in self.jobs.values():
+            job.thread = threading.Thread(target=self._run, args=(job,), name=job.name, daemon=True)
+            job.thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self.stop_event.set()
+        for job in self.jobs.values():
+            job.wake.set()
+        for job in self.jobs.values():
+            if job.thread:
+                job.thread.join(timeout)
+
+    def run_forever(self) -> None:
+        """Start all jobs and block until interrupted."""
+        self.start()
+        try:
+            while not self.stop_event.wait(1):
+                pass
+        except KeyboardInterrupt:
+            logger.info("Zamanlayıcı durduruluyor...")
+        finally:
+            self.stop(timeout=10)
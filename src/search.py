@@ -0,0 +1,103 @@
+import logging
+import re
+from datetime import datetime
+from functools import lru_cache
+
+import pymongo
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+SEARCH_INDEX_NAME = "news_search"
+SEARCH_FIELDS = {"search_title": 10, "search_description": 1}
+# db.meta içinde geri doldurmanın tamamlandığını kaydeden belge
+SEARCH_BACKFILL_ID = "search_fields_backfill"
+
+# Türkçe büyük/küçük harf dönüşümü: I -> ı, İ -> i
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+# Kök bulunduktan sonra aksan farklarını yok say (ör. "sirket" -> "şirket" ile eşleşsin)
+_ASCII_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+
+
+@lru_cache(maxsize=1)
+def _stemmer():
+    try:
+        from TurkishStemmer import TurkishStemmer
+        return TurkishStemmer()
+    except ImportError:
+        logger.warning("TurkishStemmer bulunamadı, arama kök bulma olmadan çalışacak")
+        return None
+
+
+@lru_cache(maxsize=65536)
+def _normalize_token(token: str) -> str:
+    stemmer = _stemmer()
+    if stemmer is not None:
+        try:
+            token = stemmer.stem(token)
+        except Exception:
+            pass
+    return token.translate(_ASCII_FOLD)
+
+
+def turkish_lower(text: str) -> str:
+    """Lowercase text with Turkish dotted/dotless i rules."""
+    return text.translate(_TURKISH_LOWER).lower()
+
+
+def search_terms(text: str) -> list:
+    """Case-folded, stemmed search terms of a text."""
+    if not text:
+        return []
+    return [_normalize_token(token) for token in TOKEN_PATTERN.findall(turkish_lower(text))]
+
+
+def search_fields(title: str, description: str) -> dict:
+    """Normalized fields stored on each news document for the text index."""
+    return {
+        "search_title": " ".join(search_terms(title)),
+        "search_description": " ".join(search_terms(description))
+    }
+
+
+def backfill_search_fields(collection, batch_size: int = 500, force: bool = False) -> int:
+    """Add search fields to documents stored before the search index existed.
+
+    The scan is unindexed, so it runs once per database: a marker in db.meta
+    records that it finished and later calls return right away (new items
+    get the fields at insert). force=True runs it again.
+    """
+    meta = collection.database.meta
+    if not force and meta.find_one({"_id": SEARCH_BACKFILL_ID}, {"_id": 1}) is not None:
+        return 0
+    updated = 0
+    cursor = collection.find(
+        {"search_title": {"$exists": False}},
+        {"title": 1, "description": 1}
+    ).batch_size(batch_size)
+    operations = []
+    for doc in cursor:
+        operations.append(pymongo.UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": search_fields(doc.get("title", ""), doc.get("description", ""))}
+        ))
+        if len(operations) >= batch_size:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+    meta.update_one(
+        {"_id": SEARCH_BACKFILL_ID},
+        {"$set": {"finished_at": datetime.utcnow(), "updated": updated}},
+        upsert=True
+    )
+    return updated
+
+
+def text_query(query: str) -> dict:
+    """$text filter for a user query, or an empty dict if it has no terms."""
+    terms = search_terms(query)
+    if not terms:
+        return {}
+    return {"$text": {"$search": " ".join(terms)}}
@@ -0,0 +1,105 @@
+import json
+import zlib
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Iterable, Iterator
+
+from bson import ObjectId
+
+from src.pagination import encode_cursor
+
+try:
+    import orjson
+except ImportError:  # orjson opsiyonel
+    orjson = None
+
+# API'nin döndürdüğü alanlar; last_updated ve arama alanları gibi iç alanlar MongoDB'den hiç okunmaz
+NEWS_PROJECTION = {
+    "source": 1,
+    "date": 1,
+    "image": 1,
+    "title": 1,
+    "description": 1,
+    "created_at": 1,
+    "url": 1,
+    "categories": 1,
+    "cluster_id": 1,
+    "shared": 1,
+    "shared_at": 1,
+}
+
+
+def _default(obj):
+    # Önceki bson.json_util çıktısıyla aynı biçim
+    if isinstance(obj, ObjectId):
+        return {"$oid": str(obj)}
+    if isinstance(obj, datetime):
+        return {"$date": obj.isoformat(timespec="milliseconds") + "Z"}
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        """Encode obj to JSON bytes, converting ObjectId and datetime in the same pass."""
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+else:
+    def dumps(obj) -> bytes:
+        """Encode obj to JSON bytes, converting ObjectId and datetime in the same pass."""
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def peek(documents: Iterable) -> Iterator:
+    """Fetch the first document eagerly so query errors surface before streaming starts."""
+    iterator = iter(documents)
+    for first in iterator:
+        return chain([first], iterator)
+    return iter(())
+
+
+def stream_page(head: dict, documents: Iterable, tail: Callable[[int, dict], dict]) -> Iterator[bytes]:
+    """Stream {**head, "data": [...], **tail(count, last_document)} straight from a cursor."""
+    head_bytes = dumps(head)
+    yield head_bytes[:-1] + (b"," if head else b"") + b'"data":['
+    count = 0
+    last = None
+    for document in documents:
+        yield (b"," if count else b"") + dumps(document)
+        count += 1
+        last = document
+    tail_bytes = dumps(tail(count, last))
+    yield b"]" + (b"," + tail_bytes[1:] if len(tail_bytes) > 2 else b"}")
+
+
+def stream_ndjson(documents: Iterable, sort_by: str, checkpoint_every: int = 1000,
+                  chunk_size: int = 1000) -> Iterator[bytes]:
+    """Stream documents as NDJSON with periodic {"checkpoint": cursor} lines.
+
+    A checkpoint cursor resumes the export right after the last emitted row.
+    Rows are yielded in chunks so memory stays bounded by chunk_size.
+    """
+    buffer = []
+    count = 0
+    last = None
+    for document in documents:
+        buffer.append(dumps(document))
+        count += 1
+        last = document
+        if checkpoint_every and count % checkpoint_every == 0:
+            buffer.append(dumps({"checkpoint": encode_cursor(last.get(sort_by), last["_id"])}))
+        if len(buffer) >= chunk_size:
+            yield b"\n".join(buffer) + b"\n"
+            buffer = []
+    if last is not None and (not checkpoint_every or count % checkpoint_every):
+        buffer.append(dumps({"checkpoint": encode_cursor(last.get(sort_by), last["_id"])}))
+    if buffer:
+        yield b"\n".join(buffer) + b"\n"
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream incrementally in gzip format."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,221 @@
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.db import get_client
+from src.http_session import get_session
+from src.keywords import get_keyword_extractor
+from src.rate_limiter import RetryQueue, get_bucket, permanent_error
+from src.rotation import SourceRotation
+from src.share_state import (
+    DailyQuota, ShareState, SHARE_FAILURES, SHARE_POSTS, SHARE_RATE_WAIT_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ShareChannel:
+    """Channel-agnostic claim -> send -> mark loop shared by the share channels.
+
+    Subclasses set the class attributes below and implement format_message,
+    send and posted_fields; send records the HTTP status of the last call in
+    self.last_status (None when no response arrived) and sets
+    self.outcome_unknown on a read timeout. Claims, the daily quota,
+    the token bucket, the retry queue and source rotation are handled here.
+    """
+
+    channel = None          # share_state / metrics / rotation anahtarı, ör. "telegram"
+    display_name = None     # loglarda görünen ad
+    rate = None             # jeton kovası: saniyede istek
+    capacity = None         # jeton kovası: en fazla birikim
+    daily_limit_env = None
+    default_daily_limit = None
+    per_run = 10            # bir çalıştırmada en fazla paylaşım
+
+    def __init__(self, mongodb_uri: str = None, post_interval: float = 300, stop_event=None):
+        # MongoDB bağlantısını .env'den al, süreç genelindeki havuzu paylaş
+        self.client = get_client(mongodb_uri or os.getenv('MONGODB_URI'))
+        self.db = self.client.news_db
+        self.collection = self.db.news
+
+        # Kanala özel kaynak sırası; SHARE_WEIGHTED_ROTATION ile yoğun kaynaklar daha sık seçilir
+        self.rotation = SourceRotation(
+            self.db, self.channel, weighted=os.getenv("SHARE_WEIGHTED_ROTATION", "false").lower() == "true"
+        )
+
+        # Paylaşımlar arası bekleme; zamanlayıcı durduğunda bekleme hemen biter
+        self.post_interval = post_interval
+        self.stop_event = stop_event or threading.Event()
+
+        # Anahtar kelime motoru tüm paylaşım kanalları arasında ortak
+        self.keywords = get_keyword_extractor(self.collection)
+
+        # Keep-alive bağlantı havuzu ve zaman aşımları olan kanal oturumu
+        self.http = get_session(self.channel)
+
+        # Kanal başına jeton kovası (API'nin limit bilgisiyle beslenir) ve başarısız paylaşımlar için yeniden deneme kuyruğu
+        self.rate_limit = get_bucket(self.channel, rate=self.rate, capacity=self.capacity)
+        self.retry_queue = RetryQueue()
+        # Son API yanıtının durum kodu; yanıt alınamadıysa None
+        self.last_status = None
+        # İstek gönderildi ama yanıt okunamadı (read timeout): paylaşımın gidip gitmediği bilinmiyor
+        self.outcome_unknown = False
+
+        # Kanal başına atomik sahiplenme ve günlük kota sayacı
+        self.share_state = ShareState(self.collection, self.channel)
+        self._backfilled = False
+        self.quota = DailyQuota(
+            self.db, self.channel, limit=int(os.getenv(self.daily_limit_env, self.default_daily_limit))
+        )
+
+    def format_message(self, news: dict, hashtags: str) -> str:
+        raise NotImplementedError
+
+    def send(self, text: str) -> Optional[dict]:
+        """Post text to the channel; the decoded API response, or None on failure."""
+        raise NotImplementedError
+
+    def posted_fields(self, response: Optional[dict]) -> Optional[dict]:
+        """Fields stored with a successful post (e.g. the message id); None if it did not go out."""
+        raise NotImplementedError
+
+    def is_permanent_error(self, status) -> bool:
+        return permanent_error(status)
+
+    def _candidates(self, limit, summary):
+        """Zamanı gelen yeniden denemeleri, ardından sıradaki kaynakların en son haberlerini sahiplen."""
+        for news_id in self.retry_queue.pop_due():
+            news = self.share_state.claim({"_id": news_id})
+            if news:
+                yield news
+
+        for source in self.rotation.next_sources(limit):
+            try:
+                # Bu kaynak için bu kanalda paylaşılmamış en son haberi atomik olarak sahiplen
+                latest_news = self.share_state.claim(
+                    {
+                        "source": source,
+                        "created_at": {
+                            "$gte": (datetime.utcnow() - timedelta(days=1)).isoformat()
+                        }
+                    },
+                    sort=[("created_at", -1)]
+                )
+            except Exception as e:
+                logger.error(f"{source} kaynağı işlenirken hata: {str(e)}")
+                continue
+
+            if not latest_news:
+                summary["empty"] += 1
+                logger.debug(f"{source} için paylaşılmamış haber bulunamadı")
+                continue
+            yield latest_news
+
+    def _share_news(self, latest_news) -> bool:
+        """Sahiplenilmiş haberi paylaş ve kanal durumunu güncelle."""
+        keywords = self.keywords.keywords_for(latest_news)
+        hashtags = " ".join([f"#{word}" for word in keywords])
+
+        fields = self.posted_fields(self.send(self.format_message(latest_news, hashtags)))
+
+        if fields is not None:
+            self.share_state.mark_posted(latest_news["_id"], fields)
+            self.retry_queue.done(latest_news["_id"])
+            SHARE_POSTS.inc(channel=self.channel)
+            logger.debug(f"{latest_news['source']} kaynağından haber paylaşıldı: {latest_news['title']}")
+            return True
+
+        if self.outcome_unknown:
+            # İstek sunucuya ulaşmış olabilir; yeniden denemek çift paylaşıma yol açar.
+            # Kota geri verilmez, haber elle kontrol için failed olarak işaretlenir.
+            self.share_state.mark_failed(latest_news["_id"], "unknown outcome: read timeout")
+            SHARE_FAILURES.inc(channel=self.channel)
+            logger.warning(
+                f"{latest_news['source']} haberi için yanıt alınamadı (read timeout); "
+                f"paylaşılıp paylaşılmadığı kontrol edilmeli: {latest_news['title']}"
+            )
+            return False
+
+        # Gönderilmeyen paylaşım günlük kotadan düşülmez
+        self.quota.refund()
+        if self.is_permanent_error(self.last_status):
+            # Aynı istek yine reddedilecek (ör. 400, 403): kalıcı hata
+            self.share_state.mark_failed(latest_news["_id"], f"http {self.last_status}")
+            SHARE_FAILURES.inc(channel=self.channel)
+            logger.warning(f"{latest_news['source']} kaynağından haber paylaşılamadı ({self.last_status})")
+        elif self.retry_queue.push(latest_news["_id"], min_delay=self.rate_limit.delay()):
+            # 429, 5xx veya bağlantı hatası: geri çekilmeyle yeniden dene
+            self.share_state.release(latest_news["_id"])
+            logger.warning(f"{latest_news['source']} haberi yeniden denenecek ({self.last_status or 'yanıt yok'})")
+        else:
+            self.share_state.mark_failed(latest_news["_id"], "retries exhausted")
+            SHARE_FAILURES.inc(channel=self.channel)
+            logger.warning(f"{latest_news['source']} haberi {self.retry_queue.max_attempts} denemede paylaşılamadı")
+        return False
+
+    def share_latest_news(self):
+        """Günlük kota dolana kadar, çalıştırma başına en fazla per_run haber paylaş.
+
+        Rate limit dolduğunda beklemez; sıradaki çalıştırmaya kadar geçecek süreyi döndürür.
+        """
+        # Haber başına log yerine çalıştırma sonunda tek özet satırı
+        summary = Counter()
+        try:
+            # Eski tek bayraklı paylaşımları ilk çalıştırmada kanal durumuna taşı
+            if not self._backfilled:
+                self.share_state.backfill()
+                self._backfilled = True
+
+            # Günlük limit tek bir sayaç belgesinden okunur
+            remaining = self.quota.remaining()
+            if remaining <= 0:
+                logger.info(f"{self.display_name}: günlük paylaşım limiti doldu. Yarını bekleyeceğiz.")
+                return
+
+            share_count = min(self.per_run, remaining)
+
+            for latest_news in self._candidates(share_count, summary):
+                try:
+                    wait = self.rate_limit.try_acquire()
+                    if wait > 0:
+                        SHARE_RATE_WAIT_SECONDS.observe(wait, channel=self.channel)
+                        # Diğer işleri bekletmemek için haberi bırak, kuyruğa al ve çık
+                        self.share_state.release(latest_news["_id"])
+                        self.retry_queue.push(latest_news["_id"], min_delay=wait)
+                        logger.info(f"{self.display_name} rate limit: {int(wait)} saniye sonra devam edilecek")
+                        return max(1.0, wait)
+
+                    if not self.quota.reserve():
+                        # Başka bir işçi kotayı doldurdu
+                        self.share_state.release(latest_news["_id"])
+                        logger.info(f"{self.display_name}: günlük paylaşım limiti doldu. Yarını bekleyeceğiz.")
+                        return
+
+                    if self._share_news(latest_news):
+                        summary["posted"] += 1
+                        if summary["posted"] >= share_count:
+                            break
+                        # Paylaşımlar arasında bekle; yalnızca bu kanalın iş parçacığı bekler
+                        if self.stop_event.wait(self.post_interval):
+                            break
+                    else:
+                        summary["failed"] += 1
+                        if self.rate_limit.delay() > 0:
+                            return max(1.0, self.rate_limit.delay())
+
+                except Exception as e:
+                    # Sahiplik claim_ttl sonunda düşer, haber tekrar denenebilir
+                    logger.error(f"{latest_news['source']} kaynağı işlenirken hata: {str(e)}")
+                    continue
+
+        except Exception as e:
+            logger.error(f"share_latest_news'de hata: {str(e)}")
+        finally:
+            if summary:
+                logger.info(
+                    f"{self.display_name}: {summary['posted']} haber paylaşıldı, {summary['failed']} başarısız, "
+                    f"{summary['empty']} kaynakta yeni haber yok"
+                )
@@ -0,0 +1,223 @@
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src import metrics
+from src.db import Generation
+
+logger = logging.getLogger(__name__)
+
+# Bir haberin kanal başına paylaşım durumu: news.share.<kanal>.state
+CLAIMED = "claimed"
+POSTED = "posted"
+FAILED = "failed"
+SKIPPED = "skipped"  # aynı hikâyeden başka bir haber bu kanalda paylaşıldı
+
+# Paylaşım kanallarının ortak sayaçları; channel etiketi "telegram" / "twitter"
+SHARE_POSTS = metrics.counter("share_posts", "News items posted", ["channel"])
+SHARE_FAILURES = metrics.counter("share_failures", "Posts that failed and were not retried", ["channel"])
+SHARE_RATE_LIMITED = metrics.counter("share_rate_limited", "HTTP 429 responses from the share API", ["channel"])
+SHARE_RATE_WAIT_SECONDS = metrics.histogram(
+    "share_rate_wait_seconds", "Waits imposed by the rate limiter before the next post", ["channel"]
+)
+SHARE_SKIPPED = metrics.counter(
+    "share_cluster_skipped", "Items skipped because their story was already posted", ["channel"]
+)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShareState:
+    """Per-channel claim/post state of news items, updated atomically.
+
+    A worker claims a candidate with a single find_one_and_update, so two
+    sharer processes can never post the same item on the same channel.
+    Claims older than claim_ttl seconds (a crashed worker) can be taken over.
+    Only one item per story cluster is posted on a channel: the first claim
+    reserves the cluster in db.share_clusters and siblings are skipped.
+    """
+
+    def __init__(self, collection, channel: str, claim_ttl: float = 600, cluster_ttl_days: float = 3):
+        self.collection = collection
+        self.channel = channel
+        self.claim_ttl = claim_ttl
+        self.cluster_ttl_days = cluster_ttl_days
+        self.field = f"share.{channel}"
+        self.worker = worker_id()
+        self.clusters = collection.database.share_clusters if collection is not None else None
+        # shared/shared_at API'de görünür; değişince yanıt önbelleği geçersiz olmalı
+        self.generation = Generation(collection.database) if collection is not None else None
+
+    def backfill(self) -> int:
+        """Mark items shared before per-channel state existed as posted on every channel."""
+        result = self.collection.update_many(
+            {"shared": True, "share": {"$exists": False}},
+            [{"$set": {"share": {"legacy": {"state": POSTED, "posted_at": "$shared_at"}}}}]
+        )
+        if result.modified_count:
+            logger.info(f"{result.modified_count} eski paylaşım kanal durumuna taşındı")
+        return result.modified_count
+
+    def unclaimed(self) -> dict:
+        """Filter matching items this channel has not handled (or whose claim went stale)."""
+        stale = (datetime.utcnow() - timedelta(seconds=self.claim_ttl)).isoformat()
+        return {
+            "share.legacy": {"$exists": False},
+            "$or": [
+                {self.field: {"$exists": False}},
+                {f"{self.field}.state": CLAIMED, f"{self.field}.claimed_at": {"$lt": stale}},
+            ],
+        }
+
+    def claim(self, query_filter: dict, sort=None, max_skips: int = 5):
+        """Atomically claim the first matching unhandled item; None if there is none.
+
+        Items whose story was already taken on this channel are marked skipped
+        and the next match is tried.
+        """
+        for _ in range(max_skips + 1):
+            news = self.collection.find_one_and_update(
+                {**query_filter, **self.unclaimed()},
+                {"$set": {self.field: {
+                    "state": CLAIMED,
+                    "claimed_at": datetime.utcnow().isoformat(),
+                    "worker": self.worker,
+                }}},
+                sort=sort,
+                return_document=ReturnDocument.AFTER
+            )
+            if news is None or self._reserve_cluster(news):
+                return news
+            self._finish(news["_id"], SKIPPED, {f"{self.field}.cluster_id": news["cluster_id"]})
+            SHARE_SKIPPED.inc(channel=self.channel)
+            logger.debug(f"{self.channel}: aynı hikâye zaten paylaşıldı, atlandı: {news.get('title')}")
+        return None
+
+    def _reserve_cluster(self, news) -> bool:
+        """Reserve the item's story cluster on this channel; False if a sibling holds it."""
+        cluster_id = news.get("cluster_id")
+        if cluster_id is None:
+            return True
+        key = f"{self.channel}:{cluster_id}"
+        try:
+            self.clusters.insert_one({
+                "_id": key,
+                "channel": self.channel,
+                "news_id": news["_id"],
+                # TTL indeksi kümelenme penceresi geçince rezervasyonu siler
+                "expires_at": datetime.utcnow() + timedelta(days=self.cluster_ttl_days),
+            })
+            return True
+        except DuplicateKeyError:
+            holder = self.clusters.find_one({"_id": key}, {"news_id": 1})
+            return holder is not None and holder["news_id"] == news["_id"]
+
+    def _free_cluster(self, news_id) -> None:
+        """Let a sibling of an item that will not be posted take its story cluster."""
+        self.clusters.delete_many({"channel": self.channel, "news_id": news_id})
+
+    def _finish(self, news_id, state: str, fields: dict = None) -> None:
+        self.collection.update_one(
+            {"_id": news_id, f"{self.field}.state": CLAIMED, f"{self.field}.worker": self.worker},
+            {"$set": {
+                f"{self.field}.state": state,
+                f"{self.field}.{state}_at": datetime.utcnow().isoformat(),
+                **(fields or {}),
+            }}
+        )
+
+    def mark_posted(self, news_id, extra: dict = None) -> bool:
+        """claimed -> posted. `shared` stays the API-facing 'posted on any channel' flag.
+
+        Bumps the data generation so cached /api/news responses (shared filter,
+        shared/shared_at fields) are not served stale.
+        """
+        now = datetime.utcnow().isoformat()
+        result = self.collection.update_one(
+            {"_id": news_id, f"{self.field}.state": CLAIMED, f"{self.field}.worker": self.worker},
+            {"$set": {
+                f"{self.field}.state": POSTED,
+                f"{self.field}.posted_at": now,
+                "shared": True,
+                "shared_at": now,
+                **(extra or {}),
+            }}
+        )
+        if result.modified_count != 1:
+            return False
+        try:
+            self.generation.bump()
+        except Exception as e:
+            logger.error(f"{self.channel}: veri nesli artırılamadı: {str(e)}")
+        return True
+
+    def mark_failed(self, news_id, error: str = None) -> None:
+        """claimed -> failed; failed items are not picked up again."""
+        self._finish(news_id, FAILED, {f"{self.field}.error": error})
+        self._free_cluster(news_id)
+
+    def release(self, news_id) -> None:
+        """Drop our claim so the item can be claimed again (e.g. after a 429)."""
+        self.collection.update_one(
+            {"_id": news_id, f"{self.field}.state": CLAIMED, f"{self.field}.worker": self.worker},
+            {"$unset": {self.field: ""}}
+        )
+        self._free_cluster(news_id)
+
+
+class DailyQuota:
+    """Per-channel, per-day post counter kept in one small document.
+
+    reserve() is a single conditional $inc, so concurrent workers can never
+    exceed the limit and checking the quota no longer scans the news collection.
+    """
+
+    def __init__(self, db, channel: str, limit: int):
+        self.collection = db.share_quota
+        self.channel = channel
+        self.limit = limit
+
+    def _key(self):
+        day = datetime.utcnow().strftime("%Y-%m-%d")
+        return f"{self.channel}:{day}", day
+
+    def used(self) -> int:
+        key, _ = self._key()
+        doc = self.collection.find_one({"_id": key}, {"count": 1})
+        return doc["count"] if doc else 0
+
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used())
+
+    def reserve(self) -> bool:
+        """Take one post from today's quota; False when it is used up."""
+        key, day = self._key()
+        try:
+            self.collection.find_one_and_update(
+                {"_id": key, "count": {"$lt": self.limit}},
+                {
+                    "$inc": {"count": 1},
+                    "$setOnInsert": {
+                        "channel": self.channel,
+                        "day": day,
+                        # TTL indeksi eski günlerin sayaçlarını temizler
+                        "expires_at": datetime.utcnow() + timedelta(days=7),
+                    },
+                },
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Belge var ama limit dolu: filtre eşleşmedi, upsert aynı _id'yi eklemeye çalıştı
+            return False
+
+    def refund(self) -> None:
+        """Give back a reservation whose post did not go out."""
+        key, _ = self._key()
+        self.collection.update_one({"_id": key, "count": {"$gt": 0}}, {"$inc": {"count": -1}})
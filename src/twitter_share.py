@@ -1,21 +1,11 @@
 import logging
-from datetime import datetime, timedelta
-from pymongo import MongoClient
 import time
 import requests
 from requests_oauthlib import OAuth1
 import os
 from dotenv import load_dotenv
-from sklearn.feature_extraction.text import TfidfVectorizer
-import re
-import nltk
-from nltk.corpus import stopwords
-
-# İlk kez çalıştırıyorsan stopwords veri setini indir
-nltk.download('stopwords')
-
-# Türkçe stop words listesi
-turkish_stopwords = stopwords.words('turkish')
+from src.share_channel import ShareChannel
+from src.share_state import SHARE_RATE_LIMITED, SHARE_RATE_WAIT_SECONDS
 # .env dosyasını yükle
 load_dotenv()
 
@@ -23,29 +13,18 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class TwitterShare(ShareChannel):
+    # Jeton kovası x-rate-limit başlıklarıyla beslenir; günde en fazla 17, çalıştırma başına 4 tweet
+    channel = "twitter"
+    display_name = "Twitter"
+    rate = 200 / 900
+    capacity = 10
+    daily_limit_env = "TWITTER_DAILY_LIMIT"
+    default_daily_limit = 17
+    per_run = 4
 
-
-
-def extract_keywords(text, num_keywords=5):
-    """Haber metninden önemli kelimeleri çıkar."""
-    text = re.sub(r'[^\w\s]', '', text).lower()  # Temizleme işlemi
-
-    # TF-IDF ile anahtar kelime çıkarımı
-    vectorizer = TfidfVectorizer(stop_words=turkish_stopwords)
-    tfidf_matrix = vectorizer.fit_transform([text])
-    feature_names = vectorizer.get_feature_names_out()
-    scores = tfidf_matrix.toarray().flatten()
-
-    keywords = [feature_names[i] for i in scores.argsort()[-num_keywords:][::-1]]
-    return keywords
-
-
-class TwitterShare:
-    def __init__(self, mongodb_uri: str = None):
-        # MongoDB bağlantısını .env'den al
-        self.client = MongoClient(mongodb_uri or os.getenv('MONGODB_URI'))
-        self.db = self.client.news_db
-        self.collection = self.db.news
+    def __init__(self, mongodb_uri: str = None, post_interval: float = 300, stop_event=None):
+        super().__init__(mongodb_uri, post_interval, stop_event)
         
         # Twitter API kimlik bilgilerini .env'den al
         self.api_key = os.getenv('TWITTER_API_KEY')
@@ -54,7 +33,7 @@ class TwitterShare:
         self.access_token_secret = os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
         
         # Twitter API ayarları
-        self.api_url = "https://api.twitter.com/2/tweets"
+        self.api_url = os.getenv('TWITTER_API_URL', "https://api.twitter.com/2/tweets")
         
         # OAuth 1.0a kurulumu
         self.auth = OAuth1(
@@ -63,12 +42,11 @@ class TwitterShare:
             self.access_token,
             self.access_token_secret
         )
-        
-        # Son kullanılan kaynakları takip etmek için koleksiyon
-        self.last_used = self.db.last_used_sources
 
     def post_tweet(self, tweet_text):
         """Post a tweet using Twitter API v2 with OAuth 1.0a."""
+        self.last_status = None
+        self.outcome_unknown = False
         try:
             payload = {
                 "text": tweet_text
@@ -78,134 +56,59 @@ class TwitterShare:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(
+            response = self.http.post(
                 self.api_url,
                 auth=self.auth,
                 headers=headers,
                 json=payload
             )
+            self.last_status = response.status_code
+            
+            # Kalan istek hakkını her yanıttan güncelle
+            self.rate_limit.update_from_headers(
+                response.headers.get("x-rate-limit-remaining"),
+                response.headers.get("x-rate-limit-reset")
+            )
             
             if response.status_code == 201:  # Created
                 return response.json()
             elif response.status_code == 429:  # Rate limit
-                reset_time = int(response.headers.get("x-rate-limit-reset", time.time() + 900))
-                print("Reset time",reset_time)
-                wait_time = max(0, reset_time - time.time())
-                logger.warning(f"Rate limit hit. Waiting {int(wait_time)} seconds...")
-                time.sleep(wait_time + 5)  # 5 saniye ekstra bekleme
+                # Beklemek yerine kovayı reset zamanına kadar kapat; tweet yeniden denenecek
+                reset_time = float(response.headers.get("x-rate-limit-reset", time.time() + 900))
+                self.rate_limit.block_until(reset_time)
+                SHARE_RATE_LIMITED.inc(channel="twitter")
+                SHARE_RATE_WAIT_SECONDS.observe(max(0.0, reset_time - time.time()), channel="twitter")
+                logger.warning(f"Rate limit hit. Twitter paused for {int(max(0, reset_time - time.time()))} seconds")
                 return None
             else:
                 logger.error(f"Twitter API error: {response.status_code} - {response.text}")
                 return None
                 
+        except requests.ReadTimeout as e:
+            # İstek gönderildi ama yanıt gelmedi; sonucu bilinmediği için yeniden denenmez
+            self.outcome_unknown = True
+            logger.error(f"Twitter request timed out waiting for the response, the tweet may have been posted: {str(e)}")
+            return None
+        except requests.Timeout as e:
+            # Bağlantı kurulamadı (connect timeout): istek sunucuya ulaşmadı, yeniden denenebilir
+            logger.error(f"Twitter request timed out: {str(e)}")
+            return None
         except Exception as e:
             logger.error(f"Error posting tweet: {str(e)}")
             return None
 
-    def get_next_sources(self, limit=4):
-        """Sıradaki kaynakları seç."""
-        try:
-            # Tüm kaynakları al
-            all_sources = set(self.collection.distinct("source"))
-            
-            # Son kullanılan kaynakları al
-            last_used = set(doc['source'] for doc in self.last_used.find({}, {'source': 1}))
-            
-            # Henüz kullanılmamış kaynakları seç
-            available_sources = list(all_sources - last_used)
-            
-            # Eğer yeterli kullanılmamış kaynak yoksa, last_used'ı temizle
-            if len(available_sources) < limit:
-                self.last_used.delete_many({})
-                available_sources = list(all_sources)
-            
-            # Limit kadar kaynak seç
-            selected_sources = available_sources[:limit]
-            
-            # Seçilen kaynakları last_used'a ekle
-            for source in selected_sources:
-                self.last_used.insert_one({
-                    'source': source,
-                    'used_at': datetime.utcnow().isoformat()
-                })
-            
-            return selected_sources
-            
-        except Exception as e:
-            logger.error(f"Kaynak seçiminde hata: {str(e)}")
-            return []
-
-    def share_latest_news(self):
-        """Günde maksimum 17 tweet paylaşacak şekilde haberleri paylaş."""
-        try:
-            # Günlük tweet limitini kontrol et
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-            daily_tweets = self.collection.count_documents({
-                "shared": True,
-                "shared_at": {"$gte": today_start}
-            })
-
-            if daily_tweets >= 17:
-                logger.info("Günlük tweet limiti doldu (17/17). Yarını bekleyeceğiz.")
-                return
-
-            # Kaç tweet paylaşabileceğimizi hesapla
-            remaining_tweets = 17 - daily_tweets
-            
-            # Her çalıştırmada maksimum 4 kaynak yerine, kalan limit kadar kaynak seç
-            tweet_count = min(4, remaining_tweets)
-            sources = self.get_next_sources(limit=tweet_count)
-            
-            for source in sources:
-                try:
-                    # Bu kaynak için paylaşılmamış en son haberi bul
-                    latest_news = self.collection.find_one(
-                        {
-                            "source": source,
-                            "shared": {"$ne": True},
-                            "created_at": {
-                                "$gte": (datetime.utcnow() - timedelta(days=1)).isoformat()
-                            }
-                        },
-                        sort=[("created_at", -1)]
-                    )
-
-                    if not latest_news:
-                        logger.info(f"{source} için paylaşılmamış haber bulunamadı")
-                        continue
-
-                    keywords = extract_keywords(latest_news['title'])
-                    hashtags = " ".join([f"#{word}" for word in keywords])
+    def send(self, text):
+        return self.post_tweet(text)
 
-                    tweet_text = (
-                        f"{latest_news['title']}\n\n"
-                        f"Kaynak: {latest_news['source']}\n"
-                        f"{latest_news['url']}\n\n"
-                        f"#haber #{latest_news['source'].lower()} {hashtags}"
-                    )
-                    
-                    response = self.post_tweet(tweet_text)
-                    
-                    if response and 'data' in response:
-                        # Haberi paylaşıldı olarak işaretle
-                        self.collection.update_one(
-                            {"_id": latest_news["_id"]},
-                            {
-                                "$set": {
-                                    "shared": True,
-                                    "shared_at": datetime.utcnow().isoformat(),
-                                    "tweet_id": str(response['data']['id'])
-                                }
-                            }
-                        )
-                        logger.info(f"{source} kaynağından haber paylaşıldı: {latest_news['title']}")
-                        time.sleep(300)  # Her tweet arasında 5 dakika bekle
-                    else:
-                        logger.warning(f"{source} kaynağından haber paylaşılamadı")
-                        
-                except Exception as e:
-                    logger.error(f"{source} kaynağı işlenirken hata: {str(e)}")
-                    continue
+    def format_message(self, news, hashtags):
+        return (
+            f"{news['title']}\n\n"
+            f"Kaynak: {news['source']}\n"
+            f"{news['url']}\n\n"
+            f"#haber #{news['source'].lower()} {hashtags}"
+        )
 
-        except Exception as e:
-            logger.error(f"share_latest_news'de hata: {str(e)}")
\ No newline at end of file
+    def posted_fields(self, response):
+        if response and 'data' in response:
+            return {"tweet_id": str(response['data']['id'])}
+        return None